@@ -1,31 +1,10 @@
-import fitz
-import re
+import os
+import sys
 
-doc = fitz.open("A2013-18.pdf")
-full_text = ""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from statute_parser import parse_pdf, write_sections  # noqa: E402
 
-# Combine entire PDF text
-for page in doc:
-    full_text += page.get_text()
-
-# Use regex to extract section blocks
-pattern = r"\n?\s*(\d+[A-Z]?)\.?\s+(.*?)(?=\n\s*\d+[A-Z]?\.\s|\Z)"  # Match section + title + text
-matches = re.findall(pattern, full_text, re.DOTALL)
-
-sections = []
-
-for i, (sec_num, content) in enumerate(matches):
-    lines = content.strip().split("\n", 1)
-    title = lines[0].strip()
-    body = lines[1].strip() if len(lines) > 1 else ""
-    
-    sections.append({
-        "section": f"Section {sec_num}",
-        "title": title,
-        "text": body
-    })
-
-# Save as JSON
-import json
-with open("companies_act_sections.json", "w") as f:
-    json.dump(sections, f, indent=2)
+# Sections are parsed page by page and streamed straight into the JSON file;
+# any other act: python statute_parser.py <pdf> --out <json>
+count = write_sections(parse_pdf("A2013-18.pdf"), "companies_act_sections.json")
+print(f"Extracted {count} sections into companies_act_sections.json")
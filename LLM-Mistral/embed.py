@@ -1,6 +1,25 @@
+import os
+import re
+import sys
+import json
+
 from chromadb import PersistentClient
 from sentence_transformers import SentenceTransformer
-import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from vector_store import ChromaVectorStore, sync_documents  # noqa: E402
+
+
+def section_ids(sections):
+    """Stable id per section ("section-12", "section-12-2" for a repeated number)."""
+    seen = {}
+    ids = []
+    for sec in sections:
+        base = "section-" + re.sub(r"[^0-9a-z]+", "-", sec["section"].lower().replace("section", "")).strip("-")
+        seen[base] = seen.get(base, 0) + 1
+        ids.append(base if seen[base] == 1 else f"{base}-{seen[base]}")
+    return ids
+
 
 # Load legal data
 with open("companies_act_sections_filled_retry.json", "r") as f:
@@ -11,22 +30,19 @@ model = SentenceTransformer("all-MiniLM-L6-v2")
 
 # ChromaDB setup
 client = PersistentClient(path="chroma_db")
-collection = client.get_or_create_collection("companies_act")
-
-# Optional: clear existing
-ids = collection.get()["ids"]
-if ids:
-    collection.delete(ids=ids)
-
-# Add data
-for i, sec in enumerate(sections):
-    doc_id = f"section-{i}"
-    content = f"{sec['section']} - {sec['title']}\n{sec['text']}"
-    collection.add(
-        documents=[content],
-        ids=[doc_id],
-        metadatas=[{"section": sec["section"], "title": sec["title"]}]
-    )
-
-client.persist()
-print("✅ Legal data embedded and stored successfully.")
+store = ChromaVectorStore(client.get_or_create_collection("companies_act"))
+
+# Only new or edited sections are embedded (one batched pass) and written;
+# sections that disappeared from the JSON are removed
+ids = section_ids(sections)
+documents = [f"{sec['section']} - {sec['title']}\n{sec['text']}" for sec in sections]
+stats = sync_documents(
+    store,
+    ids,
+    documents,
+    encode=model.encode,
+    sections=[sec["section"] for sec in sections],
+    extra=[{"title": sec["title"]} for sec in sections],
+)
+
+print(f"✅ Legal data embedded and stored successfully ({stats}).")
@@ -0,0 +1,332 @@
+"""
+Admission control for the expensive endpoints (OCR + LLM summaries, RAG,
+document generation).
+
+Each limited endpoint gets an AdmissionController: at most `limit` requests
+run at once, up to `queue` more wait, and anything beyond that is turned
+away immediately with 429 + Retry-After instead of piling up behind the LLM
+until every request times out. Waiting requests are admitted round-robin
+across users (session user_id, else the client address), and one user can
+hold at most `per_user` running + waiting requests per endpoint, so a single
+client cannot fill the queue. Limits apply per worker process.
+
+Limits are "limit:queue:max_wait_seconds:per_user" per endpoint name, with
+defaults below and overrides in ADMISSION_LIMITS, e.g.
+    ADMISSION_LIMITS="summarize.summarize=2:4:30:1,rag.ask_rag=8:32:10:2"
+ADMISSION_LIMITS=off disables admission control.
+"""
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# endpoint: (limit, queue, max_wait seconds, per_user)
+DEFAULT_LIMITS = {
+    "summarize.summarize": (2, 4, 30.0, 1),     # Flask: OCR + ollama.chat
+    "rag.ask_rag": (8, 32, 10.0, 2),
+    "summarize": (4, 8, 30.0, 1),               # ASGI app endpoints
+    "generate_document": (2, 4, 60.0, 1),       # also docgenerator/app.py (Flask)
+    "ask_rag": (16, 64, 10.0, 2),
+}
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def parse_limits(value=None, defaults=DEFAULT_LIMITS):
+    """{endpoint: (limit, queue, max_wait, per_user)} from defaults + ADMISSION_LIMITS."""
+    if value is None:
+        value = os.environ.get("ADMISSION_LIMITS", "")
+    if value.strip().lower() == "off":
+        return {}
+    limits = dict(defaults)
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        endpoint, _, spec = item.partition("=")
+        parts = spec.split(":")
+        base = limits.get(endpoint.strip(), (4, 8, 30.0, 2))
+        limit, queue, max_wait, per_user = [
+            type(default)(part) if part.strip() else default
+            for part, default in zip(parts + [""] * (4 - len(parts)), base)
+        ]
+        limits[endpoint.strip()] = (limit, queue, max_wait, per_user)
+    return limits
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("user", "granted", "enqueued_at", "granted_at", "event", "loop", "future")
+
+    def __init__(self, user, loop=None):
+        self.user = user
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+        self.granted_at = None
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class AdmissionController:
+    """Concurrency limit + bounded, per-user round-robin wait queue for one endpoint."""
+
+    def __init__(self, name, limit, queue=0, max_wait=30.0, per_user=1):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue
+        self.max_wait = max_wait
+        self.per_user = per_user
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_by_user = {}
+        self._waiters = OrderedDict()     # user -> deque of tickets; order = round-robin turn
+        self._waiting = 0
+        self._service_seconds = 5.0       # EWMA of time a request holds a slot
+        # Metrics
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "user_limit": 0, "timeout": 0}
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    # ---- bookkeeping (call with the lock held) ----
+    def _retry_after(self):
+        # Roughly when a slot frees up for a newcomer behind everyone already waiting
+        return max(1, math.ceil(self._service_seconds * (self._waiting + 1) / self.limit))
+
+    def _reject(self, reason):
+        self.rejected[reason] += 1
+        return AdmissionRejected(reason, self._retry_after())
+
+    def _grant(self, ticket):
+        ticket.granted = True
+        ticket.granted_at = time.monotonic()
+        self._active += 1
+        self._active_by_user[ticket.user] = self._active_by_user.get(ticket.user, 0) + 1
+        self.admitted += 1
+        waited = ticket.granted_at - ticket.enqueued_at
+        self.wait_count += 1
+        self.wait_sum += waited
+        self.wait_buckets[next((i for i, b in enumerate(WAIT_BUCKETS) if waited <= b), len(WAIT_BUCKETS))] += 1
+
+    def _dispatch(self):
+        while self._active < self.limit and self._waiting:
+            user, tickets = next(iter(self._waiters.items()))
+            ticket = tickets.popleft()
+            self._waiting -= 1
+            if tickets:
+                self._waiters.move_to_end(user)     # next turn goes to another user
+            else:
+                del self._waiters[user]
+            self._grant(ticket)
+            ticket.wake()
+
+    def _remove(self, ticket):
+        tickets = self._waiters.get(ticket.user)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            self._waiting -= 1
+            if not tickets:
+                del self._waiters[ticket.user]
+
+    def _enter(self, user, loop=None):
+        with self._lock:
+            held = self._active_by_user.get(user, 0) + len(self._waiters.get(user, ()))
+            if held >= self.per_user:
+                raise self._reject("user_limit")
+            ticket = _Ticket(user, loop)
+            if self._active < self.limit and not self._waiting:
+                self._grant(ticket)
+                return ticket
+            if self._waiting >= self.queue_size:
+                raise self._reject("queue_full")
+            self._waiters.setdefault(user, deque()).append(ticket)
+            self._waiting += 1
+            return ticket
+
+    def _timed_out(self, ticket):
+        """After a wait ran out: True (and dequeued) unless the slot was granted meanwhile."""
+        with self._lock:
+            if ticket.granted:
+                return False
+            self._remove(ticket)
+            return True
+
+    # ---- public API ----
+    def acquire(self, user):
+        """Block until admitted; returns a ticket for release() or raises AdmissionRejected."""
+        ticket = self._enter(user)
+        if not ticket.granted:
+            ticket.event.wait(self.max_wait)
+            if self._timed_out(ticket):
+                with self._lock:
+                    raise self._reject("timeout")
+        return ticket
+
+    async def acquire_async(self, user):
+        """acquire() for asyncio code; waiting does not hold a thread."""
+        ticket = self._enter(user, asyncio.get_running_loop())
+        if not ticket.granted:
+            try:
+                await asyncio.wait_for(asyncio.shield(ticket.future), self.max_wait)
+            except asyncio.TimeoutError:
+                if self._timed_out(ticket):
+                    with self._lock:
+                        raise self._reject("timeout")
+            except asyncio.CancelledError:
+                # Client went away: give back the slot if it was granted meanwhile
+                if not self._timed_out(ticket):
+                    self.release(ticket)
+                raise
+        return ticket
+
+    def release(self, ticket):
+        with self._lock:
+            self._active -= 1
+            remaining = self._active_by_user.get(ticket.user, 1) - 1
+            if remaining:
+                self._active_by_user[ticket.user] = remaining
+            else:
+                self._active_by_user.pop(ticket.user, None)
+            held = time.monotonic() - ticket.granted_at
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * held
+            self._dispatch()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "in_flight": self._active,
+                "queue_depth": self._waiting,
+                "waiting_users": len(self._waiters),
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "wait_seconds": {
+                    "count": self.wait_count,
+                    "sum": round(self.wait_sum, 6),
+                    "buckets": dict(zip([str(b) for b in WAIT_BUCKETS] + ["+Inf"],
+                                        _cumulative(self.wait_buckets))),
+                },
+            }
+
+
+def _cumulative(counts):
+    total = 0
+    out = []
+    for c in counts:
+        total += c
+        out.append(total)
+    return out
+
+
+def build_controllers(limits=None):
+    limits = parse_limits() if limits is None else limits
+    return {endpoint: AdmissionController(endpoint, *spec) for endpoint, spec in limits.items()}
+
+
+def rejection_response(jsonify, rejected):
+    messages = {
+        "queue_full": "Server is busy, please retry shortly",
+        "user_limit": "You already have a request of this kind in progress",
+        "timeout": "Server is busy, please retry shortly",
+    }
+    response = jsonify({"error": messages[rejected.reason], "reason": rejected.reason})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(rejected.retry_after)
+    return response
+
+
+# ---------------- Flask ---------------- #
+def init_admission(app, limits=None):
+    """
+    Limit the app's expensive endpoints; stats are served at /_admission.
+    Call before register_roles(), whose per-role thread slots then leave these endpoints to admission.
+    """
+    from flask import current_app, g, jsonify, request, session
+
+    controllers = build_controllers(limits)
+    app.extensions["admission"] = controllers
+
+    @app.before_request
+    def admit_request():
+        controller = controllers.get(request.endpoint)
+        if controller is None:
+            return None
+        user = session.get("user_id") or request.remote_addr
+        try:
+            g.admission_ticket = (controller, controller.acquire(user))
+        except AdmissionRejected as rejected:
+            logger.warning(f"Rejected {request.endpoint} for {user}: {rejected.reason}")
+            return rejection_response(jsonify, rejected)
+
+    @app.teardown_request
+    def release_admission(exc):
+        held = g.pop("admission_ticket", None)
+        if held is not None:
+            controller, ticket = held
+            controller.release(ticket)
+
+    @app.route("/_admission")
+    def admission_stats():
+        return jsonify({name: c.stats() for name, c in controllers.items()
+                        if name in current_app.view_functions})
+
+    return controllers
+
+
+# ---------------- Quart (asgi.py) ---------------- #
+def init_admission_quart(app, limits=None):
+    """init_admission() for the ASGI app: waiting requests hold no thread."""
+    from quart import current_app, g, jsonify, request, session
+
+    controllers = build_controllers(limits)
+    app.extensions["admission"] = controllers
+
+    @app.before_request
+    async def admit_request():
+        controller = controllers.get(request.endpoint)
+        if controller is None:
+            return None
+        user = session.get("user_id") or request.remote_addr
+        try:
+            g.admission_ticket = (controller, await controller.acquire_async(user))
+        except AdmissionRejected as rejected:
+            logger.warning(f"Rejected {request.endpoint} for {user}: {rejected.reason}")
+            return rejection_response(jsonify, rejected)
+
+    @app.teardown_request
+    async def release_admission(exc):
+        held = g.pop("admission_ticket", None)
+        if held is not None:
+            controller, ticket = held
+            controller.release(ticket)
+
+    @app.route("/_admission")
+    async def admission_stats():
+        return jsonify({name: c.stats() for name, c in controllers.items()
+                        if name in current_app.view_functions})
+
+    return controllers
@@ -0,0 +1,107 @@
+import time
+import threading
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Caches LLM answers keyed on the query embedding.
+    A cached answer is served when a new query is close enough (cosine similarity
+    above `threshold`) to a cached one AND retrieval returned the same documents,
+    so a reworded question never gets an answer built from different context.
+    """
+
+    def __init__(self, threshold=0.9, ttl_seconds=3600, max_entries=1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._clear()
+
+    def _clear(self):
+        self._embeddings = None   # (n, dim) float32, rows L2-normalized
+        self._doc_ids = []
+        self._answers = []
+        self._expires_at = []
+
+    @staticmethod
+    def _normalize(embedding):
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def __len__(self):
+        return len(self._answers)
+
+    def invalidate(self):
+        """Drop every cached answer (e.g. after legal_docs was re-ingested)."""
+        with self._lock:
+            self._clear()
+
+    def check_version(self, version):
+        """Invalidate the cache if the underlying document set changed."""
+        with self._lock:
+            if version != self._version:
+                self._clear()
+                self._version = version
+
+    def _drop_expired(self, now):
+        keep = [i for i, exp in enumerate(self._expires_at) if exp > now]
+        if len(keep) == len(self._expires_at):
+            return
+        self._doc_ids = [self._doc_ids[i] for i in keep]
+        self._answers = [self._answers[i] for i in keep]
+        self._expires_at = [self._expires_at[i] for i in keep]
+        self._embeddings = self._embeddings[keep] if keep else None
+
+    def get(self, query_embedding, doc_ids):
+        """Return a cached answer for this query/context, or None."""
+        vec = self._normalize(query_embedding)
+        doc_ids = tuple(doc_ids)
+        with self._lock:
+            self._drop_expired(time.monotonic())
+            if self._embeddings is not None:
+                sims = self._embeddings @ vec
+                # Best matches first; the first one with identical context wins
+                for i in np.argsort(-sims):
+                    if sims[i] < self.threshold:
+                        break
+                    if self._doc_ids[i] == doc_ids:
+                        self.hits += 1
+                        return self._answers[i]
+            self.misses += 1
+            return None
+
+    def put(self, query_embedding, doc_ids, answer, ttl_seconds=None):
+        """Store an answer together with the query embedding and retrieved doc ids."""
+        vec = self._normalize(query_embedding)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = vec[None, :]
+            else:
+                self._embeddings = np.vstack([self._embeddings, vec])
+            self._doc_ids.append(tuple(doc_ids))
+            self._answers.append(answer)
+            self._expires_at.append(time.monotonic() + ttl)
+
+            # Evict the oldest entries once over capacity
+            overflow = len(self._answers) - self.max_entries
+            if overflow > 0:
+                self._embeddings = self._embeddings[overflow:]
+                del self._doc_ids[:overflow]
+                del self._answers[:overflow]
+                del self._expires_at[:overflow]
+
+    def stats(self):
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+        }
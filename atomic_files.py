@@ -0,0 +1,55 @@
+"""
+Atomic file replacement for the generated data files (scheme JSON and
+catalog, fingerprints, embedding snapshots).
+
+    with atomic_write(path, "wb") as f:
+        f.write(data)
+
+Data goes to a temp file in the same directory, which is fsynced and renamed
+over `path`, so readers never see a partial file. tempfile.mkstemp creates
+files as 0600; before the rename the temp file gets the replaced file's
+permissions (or the umask default for a new file), so an app running as
+another user can still read the result.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def current_umask():
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    # Not thread-safe, hence only the fallback
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def target_mode(path):
+    """Permission bits for a file written to `path`: the existing file's, else 0666 minus the umask."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~current_umask()
+
+
+@contextmanager
+def atomic_write(path, mode="wb", **open_kwargs):
+    """Yield a file object whose contents replace `path` only if the block completes."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.splitext(path)[1], dir=directory)
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, target_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,139 @@
+"""
+OCR throughput and character accuracy, with and without ocr_preprocess.
+
+Scans are PDFs or images given on the command line; a `<name>.txt` next to a
+scan is used as its ground truth. Without scans, --synthetic pages are made
+from a text PDF: rendered at 300 DPI with PyMuPDF, then skewed, unevenly lit
+and noised like a phone or flatbed scan, with the PDF's text layer as truth.
+
+    plain        : pdf2image at its default 200 DPI (colour) -> tesseract
+    preprocessed : adaptive DPI, grayscale, Bradley binarization, deskew
+
+Accuracy is matched characters / ground-truth characters (difflib), after
+collapsing whitespace.
+
+Usage (needs tesseract + poppler; set TESSERACT_CMD / POPPLER_PATH as for the app):
+    python benchmarks/bench_ocr.py [SCAN ...] [--synthetic 6] [--source Docs/...pdf]
+"""
+import os
+import re
+import sys
+import time
+import random
+import difflib
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ocr_preprocess  # noqa: E402
+from services import get_ocr  # noqa: E402
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Docs",
+                              "Revised Guidelines for recognition.pdf")
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def char_accuracy(predicted, truth):
+    predicted, truth = normalize(predicted), normalize(truth)
+    if not truth:
+        return None
+    blocks = difflib.SequenceMatcher(None, predicted, truth, autojunk=False).get_matching_blocks()
+    return sum(b.size for b in blocks) / len(truth)
+
+
+def synthesize_scans(source, count, out_dir, seed=0):
+    """Write `count` degraded page images from `source`; returns [(png path, truth text)]."""
+    import fitz
+    from PIL import Image
+
+    rng = random.Random(seed)
+    scans = []
+    with fitz.open(source) as doc:
+        for i in range(min(count, len(doc))):
+            page = doc[i]
+            pix = page.get_pixmap(dpi=300)
+            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            image = image.rotate(rng.uniform(-3, 3), resample=Image.BILINEAR, expand=True, fillcolor=(255, 255, 255))
+            pixels = np.asarray(image, dtype=np.float32)
+            lighting = np.linspace(rng.uniform(0.55, 0.8), 1.0, pixels.shape[1])[None, :, None]
+            noise = np.random.default_rng(seed + i).normal(0, 10, pixels.shape)
+            pixels = np.clip(pixels * lighting + noise, 0, 255).astype(np.uint8)
+            path = os.path.join(out_dir, f"scan_{i + 1}.png")
+            Image.fromarray(pixels).save(path)
+            scans.append((path, page.get_text()))
+    return scans
+
+
+def load_scans(paths):
+    scans = []
+    for path in paths:
+        truth_path = os.path.splitext(path)[0] + ".txt"
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, "r", encoding="utf-8") as f:
+                truth = f.read()
+        scans.append((path, truth))
+    return scans
+
+
+def run_plain(ocr, path):
+    if path.lower().endswith(".pdf"):
+        started = time.perf_counter()
+        pages = ocr.convert_from_path(path, poppler_path=ocr.poppler_path)
+        rendered = time.perf_counter()
+        text = "".join(ocr.pytesseract.image_to_string(page) for page in pages)
+        return text, len(pages), rendered - started, 0.0, time.perf_counter() - rendered
+    started = time.perf_counter()
+    text = ocr.pytesseract.image_to_string(ocr.Image.open(path))
+    return text, 1, 0.0, 0.0, time.perf_counter() - started
+
+
+def run_preprocessed(ocr, path):
+    if path.lower().endswith(".pdf"):
+        results = list(ocr_preprocess.ocr_pdf(ocr, path))
+    else:
+        results = [ocr_preprocess.ocr_image(ocr, path)]
+    return ("".join(r.text for r in results), len(results),
+            sum(r.timings.render for r in results),
+            sum(r.timings.preprocess for r in results),
+            sum(r.timings.ocr for r in results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scans", nargs="*", help="PDFs / images (optional <name>.txt ground truth alongside)")
+    parser.add_argument("--synthetic", type=int, default=6, help="pages to synthesize when no scans are given")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="text PDF the synthetic scans are made from")
+    args = parser.parse_args()
+
+    ocr = get_ocr()
+    with tempfile.TemporaryDirectory() as tmp:
+        scans = load_scans(args.scans) if args.scans else synthesize_scans(args.source, args.synthetic, tmp)
+        print(f"{len(scans)} scans")
+
+        for label, run in (("plain", run_plain), ("preprocessed", run_preprocessed)):
+            pages = 0
+            totals = np.zeros(3)
+            accuracies = []
+            for path, truth in scans:
+                text, n, render, preprocess, tesseract = run(ocr, path)
+                pages += n
+                totals += (render, preprocess, tesseract)
+                accuracy = char_accuracy(text, truth)
+                if accuracy is not None:
+                    accuracies.append(accuracy)
+            seconds = totals.sum()
+            accuracy = f"{np.mean(accuracies) * 100:5.1f}%" if accuracies else "  n/a"
+            print(f"{label:13s} {pages / seconds:6.2f} pages/s   per page: render {totals[0] / pages * 1000:6.0f}ms "
+                  f"preprocess {totals[1] / pages * 1000:6.0f}ms tesseract {totals[2] / pages * 1000:6.0f}ms   "
+                  f"char accuracy {accuracy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Memory and recall benchmark for QuantizedEmbeddingStore.
+
+Reports resident bytes per million chunks for each representation and recall@10
+of the int8 / float16 paths (with and without exact rescoring) against exact float32 search.
+
+Usage:
+    python benchmarks/bench_quantized_store.py                 # synthetic MiniLM-sized data
+    python benchmarks/bench_quantized_store.py legal_docs.snap # real embeddings
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quantized_store import QuantizedEmbeddingStore  # noqa: E402
+from embedding_snapshot import EmbeddingSnapshot  # noqa: E402
+
+
+def synthetic_embeddings(n, dim, clusters=200, seed=0):
+    """Clustered unit vectors, roughly shaped like sentence embeddings of related sections."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    data = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def exact_top_k(matrix, norms, q, k):
+    scores = (matrix @ q) / (norms * np.linalg.norm(q) + 1e-8)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("snapshot", nargs="?", help="Embedding snapshot to benchmark (default: synthetic data)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.snapshot:
+        matrix = np.asarray(EmbeddingSnapshot(args.snapshot).matrix)
+    else:
+        matrix = synthetic_embeddings(args.rows, args.dim)
+    n, dim = matrix.shape
+    norms = np.linalg.norm(matrix, axis=1)
+
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, n, args.queries)
+    queries = matrix[picks] + 0.3 * rng.standard_normal((args.queries, dim)).astype(np.float32)
+
+    start = time.perf_counter()
+    truth = [set(exact_top_k(matrix, norms, q, args.k)) for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    per_million = 1_000_000 / n
+    print(f"{n} rows x {dim} dims, {args.queries} queries, recall@{args.k} vs exact float32\n")
+    print(f"{'representation':<26}{'MB / 1M chunks':>16}{'recall@10':>12}{'ms / query':>12}")
+    print(f"{'float64 (legacy lists)':<26}{n * dim * 8 * per_million / 1e6:>16.0f}{'1.000':>12}{'-':>12}")
+    print(f"{'float32 exact':<26}{matrix.nbytes * per_million / 1e6:>16.0f}{'1.000':>12}{exact_ms:>12.2f}")
+
+    for mode in QuantizedEmbeddingStore.MODES:
+        for rescore in (False, True):
+            store = QuantizedEmbeddingStore(matrix, mode=mode, exact=matrix if rescore else None)
+            start = time.perf_counter()
+            found = [store.search(q, args.k)[0] for q in queries]
+            ms = (time.perf_counter() - start) * 1000 / args.queries
+            recall = np.mean([len(truth[i] & set(f)) / args.k for i, f in enumerate(found)])
+            label = f"{mode}{' + rescore' if rescore else ''}"
+            print(f"{label:<26}{store.nbytes * per_million / 1e6:>16.0f}{recall:>12.3f}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Startup cost of the scheme catalog: JSON vs the binary .catalog format.
+
+Replicates startup_schemes_final.json up to --schemes entries, writes both
+formats, and reports load time, Python heap allocated by the load
+(tracemalloc), and match_schemes latency for each: the first call (the
+catalog decodes its matches then) and the mean of the repeats after it.
+
+Usage:
+    python benchmarks/bench_scheme_catalog.py [--schemes 10000] [--repeat 20]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from matcher import load_schemes, match_schemes  # noqa: E402
+from scheme_catalog import write_catalog  # noqa: E402
+
+BASE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "startup_schemes_final.json")
+
+
+def measure_load(path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    schemes = load_schemes(path)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return schemes, seconds, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemes", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(BASE_FILE, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    schemes = [dict(base[i % len(base)], name=f"{base[i % len(base)]['name']} #{i}") for i in range(args.schemes)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "schemes.json")
+        catalog_path = os.path.join(tmp, "schemes.catalog")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(schemes, f, indent=2, ensure_ascii=False)
+        write_catalog(catalog_path, schemes)
+
+        print(f"{args.schemes} schemes: JSON {os.path.getsize(json_path) / 1e6:.1f} MB, "
+              f"catalog {os.path.getsize(catalog_path) / 1e6:.1f} MB on disk")
+        for label, path in (("json", json_path), ("catalog", catalog_path)):
+            loaded, seconds, resident, peak = measure_load(path)
+            started = time.perf_counter()
+            results = match_schemes(loaded, "tech", "LLP", "early")
+            first_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                results = match_schemes(loaded, "tech", "LLP", "early")
+            match_ms = (time.perf_counter() - started) / args.repeat * 1000
+            print(f"{label:8s} load {seconds * 1000:8.1f} ms   heap {resident / 1e6:7.2f} MB "
+                  f"(peak {peak / 1e6:7.2f} MB)   match first {first_ms:7.2f} ms, then {match_ms:7.2f} ms "
+                  f"({len(results)} results)")
+            del loaded
+
+
+if __name__ == "__main__":
+    main()
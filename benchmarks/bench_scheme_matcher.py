@@ -0,0 +1,127 @@
+"""
+Benchmark and parity check for the compiled eligibility keyword matcher.
+
+Runs every scheme of scraper/source_data.json through the legacy
+`any(keyword in text ...)` map_eligibility and the compiled one, fails if any
+scheme maps to different categories (also on randomized keyword soup), then
+reports microseconds per scheme for both and for clean_html.
+
+Usage:
+    python benchmarks/bench_scheme_matcher.py [path/to/source_data.json] [--repeat N]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+SCRAPER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scraper")
+sys.path.insert(0, SCRAPER_DIR)
+
+from scrap import (  # noqa: E402
+    DOMAIN_MAP, REG_MAP, STAGE_MAP, FULL_TEXT_MATCHER, clean_html, iter_ministries, map_eligibility,
+)
+
+
+def legacy_clean_html(raw_html):
+    if not raw_html:
+        return ""
+    cleanr = re.compile(r'<[^>]+>')
+    return re.sub(cleanr, '', raw_html).strip()
+
+
+def legacy_map_eligibility(full_text, eligibility_text):
+    """The per-keyword substring scan map_eligibility used before it was compiled."""
+    eligibility_data = {"domain": [], "registration": [], "stage": []}
+    for domain, keywords in DOMAIN_MAP.items():
+        if any(keyword.lower() in full_text for keyword in keywords):
+            eligibility_data["domain"].append(domain)
+    if not eligibility_data["domain"]:
+        eligibility_data["domain"].append("all")
+    for reg_type, keywords in REG_MAP.items():
+        if any(keyword.lower() in eligibility_text for keyword in keywords):
+            eligibility_data["registration"].append(reg_type)
+    if not eligibility_data["registration"]:
+        eligibility_data["registration"] = list(REG_MAP.keys())
+    for stage, keywords in STAGE_MAP.items():
+        if any(keyword.lower() in full_text for keyword in keywords):
+            eligibility_data["stage"].append(stage)
+    if not eligibility_data["stage"]:
+        eligibility_data["stage"] = list(STAGE_MAP.keys())
+    return {field: list(set(values)) for field, values in eligibility_data.items()}
+
+
+def scheme_texts(source_file):
+    """(full_text, eligibility_text, raw html fields) for every scheme, as build_scheme prepares them."""
+    texts = []
+    for _, schemes in iter_ministries(source_file):
+        for scheme in schemes or []:
+            raw = [e for e in (scheme.get("EligibilityCriteria") or []) if e]
+            raw += [b for b in (scheme.get("benefits") or []) if b]
+            eligibility_text = " ".join(clean_html(e).strip() for e in scheme.get("EligibilityCriteria") or [] if e).lower()
+            sector_text = " ".join(scheme.get("sector") or []).lower()
+            brief_text = " ".join(scheme.get("brief") or []).lower()
+            texts.append((f"{eligibility_text} {sector_text} {brief_text}", eligibility_text, raw))
+    return texts
+
+
+def random_texts(n, seed=0):
+    """Keyword fragments glued together, to hit overlaps and prefixes the real data may not."""
+    rng = random.Random(seed)
+    words = [k for m in (DOMAIN_MAP, REG_MAP, STAGE_MAP) for ks in m.values() for k in ks]
+    pieces = words + [w[:rng.randint(1, len(w))] for w in words] + [" ", "-", "/", "x"]
+    for _ in range(n):
+        full = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        eligibility = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        yield full, eligibility
+
+
+def check_parity(pairs):
+    mismatches = 0
+    for full_text, eligibility_text in pairs:
+        expected = legacy_map_eligibility(full_text, eligibility_text)
+        got = map_eligibility(full_text, eligibility_text)
+        if {k: set(v) for k, v in expected.items()} != {k: set(v) for k, v in got.items()}:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"MISMATCH for {full_text[:80]!r}: legacy={expected} compiled={got}")
+    return mismatches
+
+
+def per_call_us(func, args_list, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for args in args_list:
+            func(*args)
+    return (time.perf_counter() - started) / (repeat * len(args_list)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default=os.path.join(SCRAPER_DIR, "source_data.json"))
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--random", type=int, default=20000, help="randomized parity cases")
+    args = parser.parse_args()
+
+    texts = scheme_texts(args.source)
+    pairs = [(full, elig) for full, elig, _ in texts]
+
+    mismatches = check_parity(pairs) + check_parity(random_texts(args.random))
+    print(f"Parity: {len(pairs)} schemes + {args.random} randomized texts, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+    legacy = per_call_us(legacy_map_eligibility, pairs, args.repeat)
+    compiled = per_call_us(map_eligibility, pairs, args.repeat)
+    print(f"Matcher backend: {'aho-corasick automaton' if FULL_TEXT_MATCHER.automaton is not None else 'keyword table'}")
+    print(f"map_eligibility  legacy {legacy:8.1f} us/scheme   compiled {compiled:8.1f} us/scheme   ({legacy / compiled:.1f}x)")
+
+    html = [(h,) for _, _, raw in texts for h in raw]
+    legacy = per_call_us(legacy_clean_html, html, args.repeat)
+    compiled = per_call_us(clean_html, html, args.repeat)
+    print(f"clean_html       legacy {legacy:8.2f} us/field    compiled {compiled:8.2f} us/field    ({legacy / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
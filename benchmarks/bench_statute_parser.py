@@ -0,0 +1,86 @@
+"""
+Section parsing throughput: the old whole-document regex vs statute_parser.
+
+Page texts are extracted once up front, so the numbers measure parsing only
+(the old path: `full_text += page` then re.findall over the whole act).
+Reports pages/s, sections/s and peak Python heap (tracemalloc), and checks
+that both produce identical section records.
+
+Usage:
+    python benchmarks/bench_statute_parser.py [PDF ...] [--copies 4] [--repeat 5]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from statute_parser import SECTION_PATTERN, iter_pdf_pages, iter_sections, section_record  # noqa: E402
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LLM-Mistral", "A2013-18.pdf")
+
+
+def legacy_sections(pages):
+    full_text = ""
+    for page in pages:
+        full_text += page
+    matches = re.findall(SECTION_PATTERN.pattern, full_text, re.DOTALL)
+    return [section_record(sec_num, content) for sec_num, content in matches]
+
+
+def streaming_sections(pages):
+    return list(iter_sections(pages))
+
+
+def consume_streaming(pages):
+    # What the CLI does: records are written out as they arrive, never collected
+    count = 0
+    for _ in iter_sections(pages):
+        count += 1
+    return count
+
+
+def measure(fn, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(pages)
+    seconds = (time.perf_counter() - started) / repeat
+    tracemalloc.start()
+    fn(pages)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", default=[DEFAULT_PDF])
+    parser.add_argument("--copies", type=int, default=4, help="concatenate the pages this many times")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for pdf in args.pdfs:
+        started = time.perf_counter()
+        pages = list(iter_pdf_pages(pdf))
+        extract = time.perf_counter() - started
+        pages = pages * args.copies
+
+        legacy = legacy_sections(pages)
+        streamed = streaming_sections(pages)
+        mismatches = sum(a != b for a, b in zip(legacy, streamed)) + abs(len(legacy) - len(streamed))
+
+        print(f"{os.path.basename(pdf)}: {len(pages)} pages ({args.copies} copies), {len(legacy)} sections, "
+              f"extraction {len(pages) / args.copies / extract:.0f} pages/s, mismatches: {mismatches}")
+        for label, fn in (("legacy", lambda p: len(legacy_sections(p))), ("streaming", consume_streaming)):
+            count, seconds, peak = measure(fn, pages, args.repeat)
+            print(f"  {label:10s} {len(pages) / seconds:10.0f} pages/s {count / seconds:10.0f} sections/s   "
+                  f"peak heap {peak / 1e6:7.2f} MB")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Service roles of the Startup Assistant app.
+
+Each role is a blueprint plus its own process limits, so a deployment can run
+lightweight API workers (auth, match) separately from CPU-heavy OCR and
+embedding workers (summarize, rag) on the same host. See serve.py.
+
+Limits can be overridden per role with ROLE_<NAME>_WORKERS / ROLE_<NAME>_THREADS.
+"""
+import os
+import logging
+import threading
+from importlib import import_module
+
+from flask import jsonify, request
+
+logger = logging.getLogger(__name__)
+
+# Seconds a client is told to wait when every thread of a role is busy
+ROLE_RETRY_AFTER = 1
+
+ROLES = {
+    # name:       blueprint module, gunicorn workers, threads per worker, services to warm up
+    "auth":      {"module": "blueprints.auth", "workers": 2, "threads": 8, "warmup": []},
+    "match":     {"module": "blueprints.match", "workers": 2, "threads": 8, "warmup": ["schemes"]},
+    "summarize": {"module": "blueprints.summarize", "workers": 2, "threads": 2, "warmup": ["ocr", "llm"]},
+    "rag":       {"module": "blueprints.rag", "workers": 1, "threads": 4,
+                  "warmup": ["embedding", "rag_snapshot"]},
+    "analytics": {"module": "blueprints.analytics", "workers": 1, "threads": 4, "warmup": ["funding"]},
+}
+
+
+def parse_roles(value=None):
+    """Parse a comma-separated role list ("all" or empty means every role)."""
+    if value is None:
+        value = os.environ.get("APP_ROLES", "all")
+    names = [n.strip().lower() for n in value.split(",") if n.strip()]
+    if not names or "all" in names:
+        return list(ROLES)
+    unknown = [n for n in names if n not in ROLES]
+    if unknown:
+        raise ValueError(f"Unknown role(s) {unknown}, expected some of {list(ROLES)}")
+    return names
+
+
+def role_limits(name):
+    """(workers, threads) for a role, honouring ROLE_<NAME>_WORKERS / _THREADS overrides."""
+    role = ROLES[name]
+    workers = int(os.environ.get(f"ROLE_{name.upper()}_WORKERS", role["workers"]))
+    threads = int(os.environ.get(f"ROLE_{name.upper()}_THREADS", role["threads"]))
+    return workers, threads
+
+
+def warmup_steps(roles):
+    steps = []
+    for name in roles:
+        steps += [s for s in ROLES[name]["warmup"] if s not in steps]
+    return steps
+
+
+def register_roles(app, roles):
+    """
+    Register the blueprints for `roles` on the app.
+    When one process serves several roles, each role can hold at most its own
+    thread limit of requests at a time, so an upload burst cannot take every
+    thread away from /login. Endpoints under admission control (admission.py)
+    are bounded there instead; a role that is full answers 429 + Retry-After
+    right away rather than queueing a second time.
+    """
+    for name in roles:
+        app.register_blueprint(import_module(ROLES[name]["module"]).bp)
+    if len(roles) > 1:
+        _limit_concurrency(app, {name: threading.BoundedSemaphore(role_limits(name)[1]) for name in roles})
+    logger.info(f"Serving roles: {', '.join(roles)}")
+
+
+def _limit_concurrency(app, slots):
+    held = threading.local()
+    admitted = app.extensions.get("admission") or {}
+
+    @app.before_request
+    def acquire_role_slot():
+        slot = slots.get(request.blueprint)
+        if slot is None or request.endpoint in admitted:
+            return None
+        if not slot.acquire(blocking=False):
+            response = jsonify({"error": f"The {request.blueprint} service is busy, please retry"})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(ROLE_RETRY_AFTER)
+            return response
+        held.slot = slot
+
+    @app.teardown_request
+    def release_role_slot(exc):
+        slot = getattr(held, "slot", None)
+        if slot is not None:
+            held.slot = None
+            slot.release()
@@ -0,0 +1,70 @@
+import logging
+
+from flask import Blueprint, request, jsonify, session
+
+from funding_analytics import DIMENSIONS
+from profiles import get_profile
+from services import get_funding_store, get_funding_index
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("analytics", __name__)
+
+FILTERS = ("vertical", "city", "investor", "round_type", "year")
+
+
+@bp.route("/api/analytics/summary", methods=["GET"])
+def funding_summary():
+    return jsonify(get_funding_store().summary())
+
+
+@bp.route("/api/analytics/funding/<dimension>", methods=["GET"])
+def funding_by(dimension):
+    """
+    Funding totals grouped by vertical, city, investor, month or round_type.
+    Query params: top (default 20), sort=total_usd|rounds, and optional filters
+    vertical / city / investor / round_type / year.
+    """
+    if dimension not in DIMENSIONS:
+        return jsonify({"error": f"Unknown dimension, expected one of {list(DIMENSIONS)}"}), 404
+    try:
+        top = int(request.args.get("top", 20))
+        year = request.args.get("year")
+        if year:
+            int(year)
+    except ValueError:
+        return jsonify({"error": "top and year must be integers"}), 400
+
+    filters = {name: request.args.get(name) for name in FILTERS if request.args.get(name)}
+    results = get_funding_store().funding_by(
+        dimension, top=top, filters=filters, sort=request.args.get("sort", "total_usd")
+    )
+    return jsonify({"dimension": dimension, "filters": filters, "results": results})
+
+
+@bp.route("/api/analytics/comparables", methods=["GET"])
+def comparables_for_current_user():
+    """Similar funded startups and likely investors for the logged-in founder's startup."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+
+    profile = get_profile(user_id)
+    startup = profile.startup if profile else None
+    if not startup:
+        return jsonify({"error": "Startup profile not found for this user"}), 404
+
+    try:
+        top = int(request.args.get("top", 10))
+    except ValueError:
+        return jsonify({"error": "top must be an integer"}), 400
+
+    results = get_funding_index().lookup(
+        domain=startup.domain,
+        location=startup.location,
+        stage=startup.stage,
+        text=request.args.get("q"),
+        top=top,
+    )
+    results["profile"] = {"domain": startup.domain, "location": startup.location, "stage": startup.stage}
+    return jsonify(results)
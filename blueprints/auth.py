@@ -0,0 +1,171 @@
+import logging
+
+from flask import Blueprint, current_app, request, jsonify, session, render_template
+from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User, Startup
+from profiles import get_profile
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("auth", __name__)
+
+
+# --- API Routes ---
+@bp.route("/signup", methods=["POST"])
+def signup():
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Invalid JSON payload"}), 400
+
+    required_fields = ["full_name", "email", "password", "startup_name", "domain", "registration_type", "stage"]
+    if not all(field in data for field in required_fields):
+        return jsonify({"error": "Missing required fields"}), 400
+
+    try:
+        if User.query.filter_by(email=data["email"]).first():
+            return jsonify({"error": "Email already registered"}), 409
+
+        new_user = User(
+            full_name=data["full_name"],
+            email=data["email"].lower(),
+            password_hash=generate_password_hash(data["password"])
+        )
+        db.session.add(new_user)
+        db.session.flush()
+
+        new_startup = Startup(
+            user_id=new_user.user_id,
+            startup_name=data["startup_name"],
+            domain=data["domain"],
+            registration_type=data["registration_type"],
+            stage=data["stage"],
+            funding_amount=data.get("funding_amount"),
+            team_size=data.get("team_size"),
+            location=data.get("location"),
+            website=data.get("website"),
+            problem_statement=data.get("problem_statement"),
+            vision=data.get("vision")
+        )
+        db.session.add(new_startup)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "A database integrity error occurred."}), 500
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("An unexpected error occurred during signup")
+        return jsonify({"error": "An unexpected error occurred. Please try again."}), 500
+
+    # Workers serving the matcher store the new startup's matches right away (elsewhere,
+    # or if this fails, they are computed on the first /api/match/auto); never fails the signup
+    if "match" in current_app.config.get("APP_ROLES", ()):
+        try:
+            from scheme_matches import materialize
+            from services import get_schemes_and_version
+            materialize(new_startup, *get_schemes_and_version())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception(f"Could not store scheme matches for startup {new_startup.startup_id}")
+
+    return jsonify({"message": "Signup successful"}), 201
+
+
+@bp.route("/login", methods=["POST"])
+def login():
+    data = request.get_json()
+    if not data or not data.get("email") or not data.get("password"):
+        return jsonify({"error": "Email and password are required"}), 400
+
+    user = User.query.filter_by(email=data["email"].lower()).first()
+
+    if user and check_password_hash(user.password_hash, data["password"]):
+        session["user_id"] = user.user_id
+        return jsonify({
+            "message": "Login successful",
+            "user_id": user.user_id
+        }), 200
+
+    return jsonify({"error": "Invalid email or password"}), 401
+
+
+# Serve main index (templates/index.html expected)
+@bp.route("/")
+def index():
+    return render_template("index.html")
+
+
+# route for login.html page (GET)
+@bp.route("/login.html")
+def login_html():
+    return render_template("login.html")
+
+
+@bp.route("/logout", methods=["POST"])
+def logout():
+    session.clear()
+    return jsonify({"message": "Logout successful"}), 200
+
+
+@bp.route("/user/<int:user_id>", methods=["GET"])
+def get_user(user_id):
+    profile = get_profile(user_id)
+    if not profile:
+        return jsonify({"error": "User not found"}), 404
+
+    startup = profile.startup
+
+    return jsonify({
+        "user_id": profile.user.user_id,
+        "full_name": profile.user.full_name,
+        "email": profile.user.email,
+        "startup": {
+            "startup_name": startup.startup_name if startup else None,
+            "domain": startup.domain if startup else None,
+            "registration_type": startup.registration_type if startup else None,
+            "stage": startup.stage if startup else None,
+            "funding_amount": startup.funding_amount if startup else None,
+            "team_size": startup.team_size if startup else None,
+            "location": startup.location if startup else None,
+            "website": startup.website if startup else None,
+            "problem_statement": startup.problem_statement if startup else None,
+            "vision": startup.vision if startup else None
+        }
+    }), 200
+
+
+@bp.route("/current_user", methods=["GET"])
+def current_user():
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"logged_in": False}), 200
+
+    profile = get_profile(user_id)
+    if not profile:
+        return jsonify({"logged_in": False}), 200
+
+    return jsonify({
+        "logged_in": True,
+        "user_id": profile.user.user_id,
+        "full_name": profile.user.full_name,
+        "email": profile.user.email
+    }), 200
+
+
+@bp.route("/dashboard.html")
+def dashboard_html():
+    return render_template("dashboard.html")
+
+
+@bp.route("/index.html")
+def index_html_alias():
+    # Serve the same index page for /index.html
+    return render_template("index.html")
+
+
+@bp.route("/styles.css")
+def styles_css():
+    # Serve styles.css from the /static folder
+    return current_app.send_static_file("styles.css")
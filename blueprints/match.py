@@ -0,0 +1,103 @@
+import logging
+
+import click
+from flask import Blueprint, request, jsonify, session, render_template
+from sqlalchemy.orm import joinedload
+
+from models import db, Startup
+from http_cache import cached_json_response, normalize_filters, not_modified
+from matcher import match_schemes
+from profiles import get_profile
+from scheme_matches import hydrate, is_fresh, matches_for, recompute_all
+from services import get_schemes_and_version
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("match", __name__)
+
+
+# Scheme matcher page (templates/scheme_matcher.html expected)
+@bp.route("/scheme-matcher")
+def scheme_matcher_page():
+    return render_template("scheme_matcher.html")
+
+
+# route for scheme_matcher.html (if you link directly to it)
+@bp.route("/scheme_matcher.html")
+def scheme_matcher_html():
+    return render_template("scheme_matcher.html")
+
+
+# Provide both endpoints in case frontend expects /match or /api/match.
+# GET takes the same filters as query parameters and supports If-None-Match.
+@bp.route("/match", methods=["GET", "POST"])
+@bp.route("/api/match", methods=["GET", "POST"])
+def match_route():
+    try:
+        data = request.args if request.method == "GET" else (request.get_json(silent=True) or {})
+        domain = data.get("domain")
+        registration = data.get("registration") or data.get("registration_type")
+        stage = data.get("stage")
+        filters = normalize_filters(domain, registration, stage)
+        schemes, version = get_schemes_and_version()
+        return cached_json_response(
+            ("match", version) + filters,
+            lambda: match_schemes(schemes, *filters),
+        )
+    except Exception as e:
+        logger.exception("Error while processing match request")
+        return jsonify({"error": "Server error while matching schemes"}), 500
+
+
+@bp.route("/api/match/auto", methods=["GET"])
+def match_for_current_user():
+    """Scheme matches for the logged-in user's startup, served from startup_scheme_matches."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+
+    profile = get_profile(user_id)
+    if not profile or not profile.startup:
+        return jsonify({"error": "Startup profile not found for this user"}), 404
+
+    startup = profile.startup
+    schemes, version = get_schemes_and_version()
+    # The payload depends only on the catalog and the criteria, so users sharing them share an entry
+    key = ("auto", version, startup.domain, startup.registration_type, startup.stage)
+    # Revalidation needs neither the stored matches nor a recompute
+    response = not_modified(key, private=True)
+    if response is not None:
+        return response
+
+    if is_fresh(profile.matches, startup, version):
+        results = hydrate(schemes, profile.matches)
+    else:
+        # Missing or stale: recompute on the ORM row (the commit drops the cached profile)
+        row = (db.session.query(Startup)
+               .options(joinedload(Startup.scheme_match))
+               .filter(Startup.startup_id == startup.startup_id)
+               .one())
+        results = matches_for(row, row.scheme_match, schemes, version)
+
+    return cached_json_response(
+        key,
+        lambda: {
+            "criteria": {
+                "domain": startup.domain,
+                "registration": startup.registration_type,
+                "stage": startup.stage,
+            },
+            "results": results
+        },
+        private=True,
+    )
+
+
+# ---------------- CLI ---------------- #
+@bp.cli.command("recompute")
+@click.option("--all", "force", is_flag=True, help="Recompute every startup, not only stale ones")
+@click.option("--batch-size", default=500, show_default=True)
+def recompute_matches_command(force, batch_size):
+    """Materialize scheme matches for all startups after a catalog reload."""
+    stats = recompute_all(*get_schemes_and_version(), force=force, batch_size=batch_size)
+    click.echo(f"Checked {stats['checked']} startups, recomputed {stats['recomputed']}")
@@ -0,0 +1,87 @@
+import logging
+
+from flask import Blueprint, request, jsonify, render_template
+
+from instrumentation import span
+from services import get_query_encoder, get_rag_store
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("rag", __name__)
+
+
+# --- NEW: RAG (semantic search over legal_docs) ---
+# The embedding model and the vector store (memory-mapped snapshot / quantized
+# index when RAG_SNAPSHOT_PATH / RAG_QUANTIZATION are set, else legal_docs in
+# Postgres) are loaded on first use by services.py.
+
+def rag_search(query, top_k=5):
+    """
+    Return top_k matching sections from legal_docs for a given query.
+    Each result includes doc_id, section, truncated content, and similarity score.
+    """
+    with span("rag_encode"):
+        q_emb = get_query_encoder().encode(query)
+    # The store records rag_fetch / rag_score (and db_query on Postgres) inside this span
+    with span("rag_search"):
+        hits = get_rag_store().search(q_emb, top_k)
+    return [
+        {
+            "score": score,
+            "doc_id": doc_id,
+            "section": section,
+            "content": content[:500]  # truncate for response
+        }
+        for score, doc_id, section, content in hits
+    ]
+
+
+# --- NEW: RAG API endpoint (no UI) ---
+# --- RAG API endpoint (no UI) ---
+@bp.route("/ask", methods=["POST"])
+@bp.route("/api/rag/ask", methods=["POST"])
+def ask_rag():
+    """
+    Simple RAG endpoint:
+    - Input: JSON { "query": "..." }
+    - Output: top matching sections from legal_docs
+    """
+    data = request.get_json() or {}
+    query = (data.get("query") or "").strip()
+
+    if not query:
+        return jsonify({"error": "Query is required"}), 400
+
+    results = rag_search(query, top_k=5)
+
+    return jsonify({
+        "answer": "Top matching sections",
+        "results": [
+            {
+                "doc_id": r["doc_id"],
+                "section": r["section"],
+                "content": r["content"]
+            }
+            for r in results
+        ]
+    })
+
+@bp.route("/api/rag/encoder_stats", methods=["GET"])
+def encoder_stats():
+    """Micro-batcher counters for tuning EMBEDDING_BATCH_WINDOW_MS / EMBEDDING_MAX_BATCH."""
+    encoder = get_query_encoder()
+    if not hasattr(encoder, "stats"):
+        return jsonify({"batching": False})
+    return jsonify({"batching": True, **encoder.stats()})
+
+
+@bp.route("/legal-assistant")
+def legal_assistant_page():
+    # expects templates/legal_assistant.html
+    return render_template("legal_assistant.html")
+
+
+@bp.route("/legal_assistant.html")
+def legal_assistant_html_alias():
+    # support direct /legal_assistant.html
+    return render_template("legal_assistant.html")
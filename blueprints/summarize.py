@@ -0,0 +1,108 @@
+import os
+import logging
+
+from flask import Blueprint, request, jsonify, render_template
+
+from instrumentation import span
+from ocr_preprocess import OCR_PREPROCESS, ocr_image, ocr_pdf
+from services import get_ocr, get_llm
+from uploads import upload_source
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("summarize", __name__)
+
+
+# --- NEW: helper to extract text from PDFs / images ---
+def ocr_pdf_text(ocr, pdf):
+    """Text of a PDF given as a path or bytes, through the preprocessing stage unless OCR_PREPROCESS=0."""
+    if OCR_PREPROCESS:
+        return "".join(page.text for page in ocr_pdf(ocr, pdf))
+    # Convert PDF pages to images
+    if isinstance(pdf, str):
+        pages = ocr.convert_from_path(pdf, poppler_path=ocr.poppler_path)
+    else:
+        pages = ocr.convert_from_bytes(pdf, poppler_path=ocr.poppler_path)
+    text = ""
+    for page in pages:
+        with span("ocr_page"):
+            text += ocr.pytesseract.image_to_string(page)
+    return text
+
+
+def extract_text_from_file(source, file_ext):
+    """OCR a PDF or image given as a path or as an open binary file (e.g. an upload stream)."""
+    text = ""
+    try:
+        ocr = get_ocr()
+        if file_ext.lower() == ".pdf":
+            if isinstance(source, str):
+                text = ocr_pdf_text(ocr, source)
+            else:
+                # Spilled uploads are handed to poppler by path, in-memory ones as a buffer view
+                with upload_source(source) as pdf:
+                    text = ocr_pdf_text(ocr, pdf)
+        else:
+            # Process as image
+            if not isinstance(source, str):
+                source.seek(0)
+            if OCR_PREPROCESS:
+                text = ocr_image(ocr, source).text
+            else:
+                with span("ocr_page"):
+                    text = ocr.pytesseract.image_to_string(ocr.Image.open(source))
+    except Exception as e:
+        logger.exception(f"Error extracting text: {e}")
+        text = ""
+    return text.strip()
+
+
+# --- Doc summarizer page route ---
+@bp.route("/doc-summarizer")
+def doc_summarizer_page():
+    # expects templates/doc_summarizer.html
+    return render_template("doc_summarizer.html")
+
+
+# support /doc_summarizer.html directly
+@bp.route("/doc_summarizer.html")
+def doc_summarizer_html_alias():
+    return render_template("doc_summarizer.html")
+
+
+# --- summarization endpoint ---
+@bp.route("/summarize", methods=["POST"])
+def summarize():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'})
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'Empty filename'})
+
+    # Extract text using OCR / PDF conversion, straight from the spooled upload
+    # (memory or an anonymous temp file; released with the request, see uploads.py)
+    file_ext = os.path.splitext(file.filename)[1]
+    text = extract_text_from_file(file.stream, file_ext)
+
+    if not text:
+        return jsonify({'error': 'No text detected. Try a clearer scan or a text-based PDF.'})
+
+    # Summarize using Mistral via Ollama
+    try:
+        response = get_llm().chat(
+            model="mistral",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a legal assistant. Summarize the given legal text clearly and concisely."
+                },
+                {"role": "user", "content": text}
+            ]
+        )
+        summary = response['message']['content']
+    except Exception as e:
+        logger.exception("Error contacting Ollama for summarization")
+        summary = f"❌ Error contacting Ollama: {e}"
+
+    return jsonify({'summary': summary})
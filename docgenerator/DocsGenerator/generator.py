@@ -7,84 +7,87 @@ from .utils import add_heading_paragraph, add_bullets, pdf_add_text, pdf_add_tit
 # -------------------
 # Template-based Document Generator
 # -------------------
+# Each document type is split into a prompt builder and a renderer, so callers
+# can run the LLM call however they like (sync here, async in asgi.py) and
+# hand the text to the renderer afterwards.
 
-# NDA Generator
-def generate_nda(user, startup, other_party, purpose):
-    prompt = f"""
-    You are a legal assistant. Generate a simple NDA between {startup.startup_name} (Founder: {user.full_name}) 
-    and {other_party} for {purpose}.
-    Use clear headings and bullet points for clauses.
-    """
+def ask_llm(system, prompt):
     response = ollama.chat(
         model="mistral",
-        messages=[{"role": "system", "content": "You are a legal assistant."},
+        messages=[{"role": "system", "content": system},
                   {"role": "user", "content": prompt}]
     )
-    nda_text = response['message']['content']
+    return response['message']['content']
+
+# NDA Generator
+def nda_prompt(user, startup, other_party, purpose):
+    return f"""
+    You are a legal assistant. Generate a simple NDA between {startup.startup_name} (Founder: {user.full_name})
+    and {other_party} for {purpose}.
+    Use clear headings and bullet points for clauses.
+    """
 
+def render_nda(nda_text, user, startup, other_party, purpose):
     doc = Document()
     add_heading_paragraph(doc, f"NDA Agreement: {startup.startup_name} & {other_party}", "")
     add_heading_paragraph(doc, "Clauses:", nda_text)
-    
+
     file_name = f"NDA_{startup.startup_name}_{other_party}.docx"
     doc.save(file_name)
     return file_name
 
+def generate_nda(user, startup, other_party, purpose):
+    nda_text = ask_llm("You are a legal assistant.", nda_prompt(user, startup, other_party, purpose))
+    return render_nda(nda_text, user, startup, other_party, purpose)
+
 # MoU Generator
-def generate_mou(user, startup, partner_name, purpose):
-    prompt = f"""
+def mou_prompt(user, startup, partner_name, purpose):
+    return f"""
     You are a legal assistant. Generate a MoU between {startup.startup_name} (Founder: {user.full_name})
     and {partner_name} for {purpose}. Include structured headings and bullet points.
     """
-    response = ollama.chat(
-        model="mistral",
-        messages=[{"role": "system", "content": "You are a legal assistant."},
-                  {"role": "user", "content": prompt}]
-    )
-    mou_text = response['message']['content']
 
+def render_mou(mou_text, user, startup, partner_name, purpose):
     doc = Document()
     add_heading_paragraph(doc, f"MoU: {startup.startup_name} & {partner_name}", "")
     add_heading_paragraph(doc, "Clauses:", mou_text)
-    
+
     file_name = f"MoU_{startup.startup_name}_{partner_name}.docx"
     doc.save(file_name)
     return file_name
 
+def generate_mou(user, startup, partner_name, purpose):
+    mou_text = ask_llm("You are a legal assistant.", mou_prompt(user, startup, partner_name, purpose))
+    return render_mou(mou_text, user, startup, partner_name, purpose)
+
 # RTI Draft Generator
-def generate_rti(user, startup, authority, subject, purpose):
-    prompt = f"""
-    Draft an RTI application from {user.full_name} ({startup.startup_name}) to {authority} 
+def rti_prompt(user, startup, authority, subject, purpose):
+    return f"""
+    Draft an RTI application from {user.full_name} ({startup.startup_name}) to {authority}
     for subject: {subject}. Include purpose: {purpose}. Format professionally.
     """
-    response = ollama.chat(
-        model="mistral",
-        messages=[{"role": "system", "content": "You are a legal assistant."},
-                  {"role": "user", "content": prompt}]
-    )
-    rti_text = response['message']['content']
 
+def render_rti(rti_text, user, startup, authority, subject, purpose):
     doc = Document()
     add_heading_paragraph(doc, f"RTI Application: {startup.startup_name}", "")
     add_heading_paragraph(doc, "Content:", rti_text)
-    
+
     file_name = f"RTI_{startup.startup_name}_{authority}.docx"
     doc.save(file_name)
     return file_name
 
+def generate_rti(user, startup, authority, subject, purpose):
+    rti_text = ask_llm("You are a legal assistant.", rti_prompt(user, startup, authority, subject, purpose))
+    return render_rti(rti_text, user, startup, authority, subject, purpose)
+
 # Pitch Deck Generator (PDF with formatting)
-def generate_pitch_deck(user, startup):
-    prompt = f"""
+def pitch_deck_prompt(user, startup):
+    return f"""
     Generate a concise pitch deck for {startup.startup_name}.
     Sections: Problem, Solution, Market, Business Model, Team, Vision. Use bullet points.
     """
-    response = ollama.chat(
-        model="mistral",
-        messages=[{"role": "system", "content": "You are a startup assistant."},
-                  {"role": "user", "content": prompt}]
-    )
-    pitch_text = response['message']['content']
 
+def render_pitch_deck(pitch_text, user, startup):
     pdf = FPDF()
     pdf.add_page()
     pdf_add_title(pdf, f"Pitch Deck: {startup.startup_name}")
@@ -93,3 +96,17 @@ def generate_pitch_deck(user, startup):
     file_name = f"PitchDeck_{startup.startup_name}.pdf"
     pdf.output(file_name)
     return file_name
+
+def generate_pitch_deck(user, startup):
+    pitch_text = ask_llm("You are a startup assistant.", pitch_deck_prompt(user, startup))
+    return render_pitch_deck(pitch_text, user, startup)
+
+# -------------------
+# Registry: doc_type -> (system prompt, prompt builder, renderer, extra form fields)
+# -------------------
+DOCUMENT_TYPES = {
+    "nda": ("You are a legal assistant.", nda_prompt, render_nda, ("other_party", "purpose")),
+    "pitch_deck": ("You are a startup assistant.", pitch_deck_prompt, render_pitch_deck, ()),
+    "mou": ("You are a legal assistant.", mou_prompt, render_mou, ("partner_name", "purpose")),
+    "rti": ("You are a legal assistant.", rti_prompt, render_rti, ("authority", "subject", "purpose")),
+}
@@ -1,9 +1,15 @@
 import os
+import sys
 from flask import Flask, render_template, request, send_file, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from DocsGenerator.generator import generate_nda, generate_pitch_deck, generate_mou, generate_rti
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from admission import init_admission  # noqa: E402
+
 app = Flask(__name__)
+# /generate is limited like the ASGI app's generate_document (429 + Retry-After when full)
+init_admission(app)
 
 # -------------------
 # Database Config
@@ -0,0 +1,127 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batches concurrent encode() calls into one SentenceTransformer forward pass.
+
+    The first waiting query opens a batch; the batch is flushed after `max_wait_ms`
+    or as soon as `max_batch_size` queries have arrived. Every caller blocks only
+    on its own Future, so results fan back out to the waiting request threads.
+    """
+
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def _reset_stats(self):
+        self.batches = 0
+        self.items = 0
+        self.full_batches = 0
+        self.total_wait = 0.0      # seconds queries spent waiting for their batch to close
+        self.total_encode = 0.0    # seconds spent inside model.encode
+        self.started_at = time.monotonic()
+
+    def submit(self, text):
+        """Queue one query; returns a Future resolving to its embedding."""
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def encode(self, text, timeout=None):
+        """Blocking drop-in for model.encode(text) on a single query."""
+        return self.submit(text).result(timeout)
+
+    async def encode_async(self, text):
+        """Awaitable variant for the ASGI app; does not hold a thread while waiting."""
+        import asyncio
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                self._encode_batch(self._collect())
+            except Exception:
+                # Never let one bad batch end the thread: every later encode() would hang
+                logger.exception("Embedding batcher error")
+
+    def _encode_batch(self, batch):
+        # Drop queries whose caller already gave up (e.g. a cancelled encode_async)
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        closed_at = time.perf_counter()
+        texts = [text for text, _, _ in batch]
+        try:
+            embeddings = self.model.encode(texts)
+        except Exception as e:
+            logger.exception("Batched embedding failed")
+            for _, future, _ in batch:
+                _resolve(future, exception=e)
+            return
+        encode_time = time.perf_counter() - closed_at
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            _resolve(future, result=embedding)
+
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.full_batches += len(batch) == self.max_batch_size
+            self.total_wait += sum(closed_at - queued for _, _, queued in batch)
+            self.total_encode += encode_time
+
+    def stats(self, reset=False):
+        """Throughput / latency counters for tuning max_wait_ms and max_batch_size."""
+        with self._stats_lock:
+            elapsed = time.monotonic() - self.started_at
+            stats = {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queued": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "full_batches": self.full_batches,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "avg_wait_ms": self.total_wait / self.items * 1000 if self.items else 0.0,
+                "avg_encode_ms": self.total_encode / self.batches * 1000 if self.batches else 0.0,
+                "items_per_second": self.items / elapsed if elapsed else 0.0,
+            }
+            if reset:
+                self._reset_stats()
+            return stats
+
+
+def _resolve(future, result=None, exception=None):
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass    # already resolved or cancelled
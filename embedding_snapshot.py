@@ -0,0 +1,296 @@
+"""
+On-disk snapshot of the legal_docs embeddings.
+
+Layout (all little-endian, every section 64-byte aligned):
+
+    header   : magic, format version, dim, count, section offsets, crc32
+    matrix   : float32[count, dim]   raw embeddings
+    norms    : float32[count]        L2 norm of each row
+    ids      : int64[count]          legal_docs.id
+    offsets  : uint64[3 * count + 1] doc_id i  = blob[o[3i]:o[3i+1]],
+                                     section i = blob[o[3i+1]:o[3i+2]],
+                                     content i = blob[o[3i+2]:o[3i+3]]
+    blob     : utf-8 text
+
+The file is opened with np.memmap, so every worker process that loads the same
+snapshot shares the same physical pages and no worker has to query Postgres at startup.
+
+Usage:
+    python embedding_snapshot.py export legal_docs.snap
+    python embedding_snapshot.py verify legal_docs.snap [--against-db]
+"""
+import os
+import sys
+import zlib
+import struct
+import logging
+import argparse
+
+import numpy as np
+
+from atomic_files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LDSNAP\x00\x00"
+FORMAT_VERSION = 2             # 2: legal_docs.doc_id stored alongside legal_docs.id
+FIELDS = 3                     # strings per row: doc_id, section, content
+ALIGN = 64
+
+# magic, version, dim, count, matrix, norms, ids, offsets, blob, blob_size, crc32
+HEADER = struct.Struct("<8sIIQQQQQQQI")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _align(pos):
+    return (pos + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_snapshot(path, ids, doc_ids, sections, contents, embeddings):
+    """Write a snapshot atomically (readers never see a half-written file)."""
+    matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+    count = len(ids)
+    if matrix.ndim != 2 or matrix.shape[0] != count:
+        raise SnapshotError(f"Expected {count} embeddings, got array of shape {matrix.shape}")
+    dim = matrix.shape[1]
+
+    norms = np.linalg.norm(matrix, axis=1).astype(np.float32)
+    ids = np.asarray(ids, dtype=np.int64)
+
+    offsets = np.zeros(FIELDS * count + 1, dtype=np.uint64)
+    chunks = []
+    pos = 0
+    for i in range(count):
+        for j, text in enumerate((doc_ids[i] or "", sections[i] or "", contents[i] or "")):
+            data = str(text).encode("utf-8")
+            offsets[FIELDS * i + j] = pos
+            chunks.append(data)
+            pos += len(data)
+    offsets[FIELDS * count] = pos
+    blob = b"".join(chunks)
+
+    matrix_off = _align(HEADER.size)
+    norms_off = _align(matrix_off + matrix.nbytes)
+    ids_off = _align(norms_off + norms.nbytes)
+    offsets_off = _align(ids_off + ids.nbytes)
+    blob_off = _align(offsets_off + offsets.nbytes)
+
+    crc = 0
+    for part in (matrix, norms, ids, offsets):
+        crc = zlib.crc32(part.tobytes(), crc)
+    crc = zlib.crc32(blob, crc)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, dim, count, matrix_off, norms_off,
+                         ids_off, offsets_off, blob_off, len(blob), crc)
+
+    with atomic_write(path, "wb") as f:
+        for offset, data in ((0, header), (matrix_off, matrix.tobytes()),
+                             (norms_off, norms.tobytes()), (ids_off, ids.tobytes()),
+                             (offsets_off, offsets.tobytes()), (blob_off, blob)):
+            f.seek(offset)
+            f.write(data)
+    return count
+
+
+class EmbeddingSnapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise SnapshotError(f"{path}: file too short for a snapshot header")
+        (magic, version, self.dim, self.count, matrix_off, norms_off, ids_off,
+         offsets_off, blob_off, blob_size, self.crc32) = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not an embedding snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path}: unsupported snapshot version {version}")
+
+        def view(dtype, offset, shape):
+            if not np.prod(shape):
+                return np.zeros(shape, dtype=dtype)
+            return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+        self.matrix = view(np.float32, matrix_off, (self.count, self.dim))
+        self.norms = view(np.float32, norms_off, (self.count,))
+        self.ids = view(np.int64, ids_off, (self.count,))
+        self.offsets = view(np.uint64, offsets_off, (FIELDS * self.count + 1,))
+        self.blob = view(np.uint8, blob_off, (blob_size,))
+
+    def __len__(self):
+        return self.count
+
+    def _text(self, start, end):
+        return self.blob[int(start):int(end)].tobytes().decode("utf-8")
+
+    def _field(self, i, j):
+        return self._text(self.offsets[FIELDS * i + j], self.offsets[FIELDS * i + j + 1])
+
+    def doc_id(self, i):
+        return self._field(i, 0)
+
+    def section(self, i):
+        return self._field(i, 1)
+
+    def content(self, i):
+        return self._field(i, 2)
+
+    def key(self, i, key_column="id"):
+        """Row identifier: legal_docs.id (int) or legal_docs.doc_id (str), as PostgresVectorStore's key_column."""
+        return int(self.ids[i]) if key_column == "id" else self.doc_id(i)
+
+    def scores(self, query_embedding):
+        """Cosine similarity of the query against every row."""
+        q = np.asarray(query_embedding, dtype=np.float32).ravel()
+        return (self.matrix @ q) / (self.norms * np.linalg.norm(q) + 1e-8)
+
+    def search(self, query_embedding, top_k=5, key_column="id"):
+        """Return [(score, key, section, content)] for the top_k rows."""
+        if not self.count:
+            return []
+        scores = self.scores(query_embedding)
+        k = min(top_k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return self.rows(top, scores[top], key_column)
+
+    def rows(self, indices, scores, key_column="id"):
+        """Materialize [(score, key, section, content)] for the given row indices."""
+        return [(float(score), self.key(i, key_column), self.section(i), self.content(i))
+                for i, score in zip(indices, scores)]
+
+    def verify(self):
+        """Raise SnapshotError if the snapshot is corrupt; returns a list of warnings."""
+        crc = 0
+        for part in (self.matrix, self.norms, self.ids, self.offsets, self.blob):
+            crc = zlib.crc32(np.ascontiguousarray(part).tobytes(), crc)
+        if crc != self.crc32:
+            raise SnapshotError(f"{self.path}: checksum mismatch")
+        if self.count and int(self.offsets[-1]) != len(self.blob):
+            raise SnapshotError(f"{self.path}: offsets table does not cover the content blob")
+        if np.any(np.diff(self.offsets.astype(np.int64)) < 0):
+            raise SnapshotError(f"{self.path}: offsets table is not monotonic")
+
+        warnings = []
+        if not np.all(np.isfinite(self.matrix)):
+            warnings.append("matrix contains NaN/inf values")
+        zero_rows = int(np.sum(self.norms == 0))
+        if zero_rows:
+            warnings.append(f"{zero_rows} rows have a zero embedding")
+        if len(np.unique(self.ids)) != self.count:
+            warnings.append("ids are not unique")
+        return warnings
+
+
+def open_snapshot(path):
+    """Open the snapshot at `path`, or return None if it is missing or unreadable."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snapshot = EmbeddingSnapshot(path)
+        logger.info(f"Loaded embedding snapshot {path} ({snapshot.count} rows, dim {snapshot.dim})")
+        return snapshot
+    except (SnapshotError, OSError, ValueError) as e:
+        logger.error(f"Ignoring embedding snapshot {path}: {e}")
+        return None
+
+
+# ---------------- CLI ---------------- #
+def _connect():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("PGHOST", "localhost"),
+        database=os.environ.get("PGDATABASE", "startup_assistant"),
+        user=os.environ.get("PGUSER", "postgres"),
+        password=os.environ.get("PGPASSWORD", "300234"),
+        port=os.environ.get("PGPORT", "5432"),
+    )
+
+
+def export_from_db(path, batch_size=1000):
+    conn = _connect()
+    try:
+        # Named cursor streams rows instead of materializing the whole table client-side
+        cur = conn.cursor(name="legal_docs_snapshot")
+        cur.itersize = batch_size
+        cur.execute("SELECT id, doc_id, section, content, embedding FROM legal_docs "
+                    "WHERE embedding IS NOT NULL ORDER BY id")
+        ids, doc_ids, sections, contents, embeddings = [], [], [], [], []
+        for row_id, doc_id, section, content, embedding in cur:
+            ids.append(row_id)
+            doc_ids.append(doc_id)
+            sections.append(section)
+            contents.append(content)
+            embeddings.append(np.asarray(embedding, dtype=np.float32))
+        cur.close()
+    finally:
+        conn.close()
+
+    matrix = np.vstack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+    return write_snapshot(path, ids, doc_ids, sections, contents, matrix)
+
+
+def verify_against_db(snapshot):
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM legal_docs WHERE embedding IS NOT NULL")
+        (db_count,) = cur.fetchone()
+        problems = []
+        if db_count != snapshot.count:
+            problems.append(f"snapshot has {snapshot.count} rows, legal_docs has {db_count}")
+
+        # Spot-check a handful of rows spread over the file
+        for i in np.linspace(0, snapshot.count - 1, num=min(10, snapshot.count), dtype=int):
+            row_id = int(snapshot.ids[i])
+            cur.execute("SELECT doc_id, content, embedding FROM legal_docs WHERE id = %s", (row_id,))
+            row = cur.fetchone()
+            if row is None:
+                problems.append(f"doc {row_id} no longer exists in legal_docs")
+            elif (row[0] or "") != snapshot.doc_id(i) or row[1] != snapshot.content(i) or not np.allclose(
+                    np.asarray(row[2], dtype=np.float32), snapshot.matrix[i], atol=1e-6):
+                problems.append(f"doc {row_id} differs from legal_docs")
+        cur.close()
+        return problems
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Export / verify legal_docs embedding snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Export legal_docs to a snapshot file")
+    export.add_argument("path")
+    verify = sub.add_parser("verify", help="Check a snapshot file for corruption")
+    verify.add_argument("path")
+    verify.add_argument("--against-db", action="store_true",
+                        help="Also compare row count and sample rows with legal_docs")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        count = export_from_db(args.path)
+        logging.info(f"Wrote {count} embeddings to {args.path}")
+        return 0
+
+    try:
+        snapshot = EmbeddingSnapshot(args.path)
+        problems = snapshot.verify()
+    except SnapshotError as e:
+        logging.error(str(e))
+        return 1
+    if args.against_db:
+        problems += verify_against_db(snapshot)
+    for problem in problems:
+        logging.warning(problem)
+    logging.info(f"{args.path}: version {FORMAT_VERSION}, {snapshot.count} rows, dim {snapshot.dim}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""
+Columnar, in-memory analytics over dataset/startup_funding.csv.
+
+The CSV is parsed as a stream of chunks (on refresh, only the bytes appended
+since the last one); every chunk is normalized (Indian-format
+amounts such as "20,00,00,000", sloppy dates, city / vertical spelling variants)
+and appended to compact NumPy columns with dictionary-encoded categoricals.
+Funding totals by vertical, city, investor and month are maintained
+incrementally with np.bincount, so dashboard group-bys are array lookups.
+"""
+import os
+import re
+import csv
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FUNDING_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset", "startup_funding.csv")
+
+# CSV header -> column name used here
+COLUMNS = {
+    "Date dd/mm/yyyy": "date",
+    "Startup Name": "startup",
+    "Industry Vertical": "vertical",
+    "SubVertical": "subvertical",
+    "City  Location": "city",
+    "Investors Name": "investors",
+    "InvestmentnType": "round_type",
+    "Amount in USD": "amount",
+}
+DIMENSIONS = ("vertical", "city", "investor", "month", "round_type")
+
+MISSING = {"", "nan", "n/a", "na", "undisclosed", "unknown", "-"}
+# Placeholder investor names ("Undisclosed Investors", "3 undisclosed HNIs", "Unknown ...")
+_ANONYMOUS_INVESTOR_RE = re.compile(r"^(\d+\s+|other\s+|group of\s+)?(undisclosed|unknown|unnamed)\b", re.IGNORECASE)
+
+CITY_ALIASES = {
+    "bengaluru": "Bangalore",
+    "gurugram": "Gurgaon",
+    "delhi": "New Delhi",
+    "new delhi": "New Delhi",
+}
+
+_NBSP_RE = re.compile(r"(\\\\?x[cC]2\\\\?x[aA]0|\xa0)")
+_DATE_RE = re.compile(r"(\d{1,2})\D*?(\d{1,2})\D+?(\d{2,4})$|(\d{1,2})\D+(\d{1,2})(\d{4})$")
+_INVESTOR_SPLIT_RE = re.compile(r"\s*,\s*|\s+and\s+")
+_KEY_RE = re.compile(r"[^a-z0-9]")
+
+
+# ---------------- Normalization ---------------- #
+def clean_text(value):
+    """Strip whitespace and the literal / real non-breaking spaces the scrape left behind."""
+    value = _NBSP_RE.sub(" ", value or "").strip()
+    return "" if value.lower() in MISSING else value
+
+
+def parse_amount(value):
+    """'20,00,00,000' -> 200000000.0; undisclosed / N/A -> nan."""
+    value = clean_text(value).replace(",", "").rstrip("+")
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def parse_date(value):
+    """dd/mm/yyyy with the dataset's typos ('12/05.2015', '05/072018', '01/07/015') -> datetime64[D] or NaT."""
+    match = _DATE_RE.search(clean_text(value))
+    if not match:
+        return np.datetime64("NaT")
+    day, month, year = (int(g) for g in (match.groups()[:3] if match.group(1) else match.groups()[3:]))
+    if year < 100 or 100 <= year < 1000:
+        year = 2000 + year % 100
+    try:
+        return np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", "D")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+def canonical_city(value):
+    value = clean_text(value)
+    # Multi-city rows ("Bangalore / SFO") are attributed to the first city
+    value = re.split(r"\s*[/,]\s*", value)[0] if value else value
+    return CITY_ALIASES.get(value.lower(), value)
+
+
+def category_key(value):
+    """Spelling-insensitive key: 'eCommerce', 'E-Commerce' and 'Ecommerce' all map to 'ecommerce'."""
+    return _KEY_RE.sub("", value.lower())
+
+
+def split_investors(value):
+    value = clean_text(value)
+    if not value:
+        return []
+    return [name for name in _INVESTOR_SPLIT_RE.split(value)
+            if clean_text(name) and not _ANONYMOUS_INVESTOR_RE.match(name)]
+
+
+# ---------------- Column storage ---------------- #
+class Categorical:
+    """Growing dictionary encoding: value <-> small int code."""
+
+    def __init__(self, keyfunc=None):
+        self.keyfunc = keyfunc
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        key = self.keyfunc(value) if self.keyfunc else value
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)   # first spelling seen becomes the label
+        return code
+
+    def lookup(self, value):
+        """Code for `value`, or None if it never occurred."""
+        return self._codes.get(self.keyfunc(value) if self.keyfunc else value)
+
+    def encode(self, values):
+        return np.fromiter((self.code(v) for v in values), dtype=np.int32, count=len(values))
+
+
+class FundingStore:
+    """
+    Append-only columnar store of funding rounds plus incrementally maintained aggregates.
+
+    Columns: date (datetime64[D]), amount (float64, nan = undisclosed) and
+    int32 codes for startup / vertical / subvertical / city / round type / month.
+    Investors are multi-valued, stored CSR-style (investor_codes + investor_rows).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.generation = 0           # bumped when a rewritten CSV is re-read from scratch
+        self._reset()
+
+    def _reset(self):
+        self.categories = {
+            "startup": Categorical(category_key),
+            "vertical": Categorical(category_key),
+            "subvertical": Categorical(category_key),
+            "city": Categorical(category_key),
+            "round_type": Categorical(category_key),
+            "investor": Categorical(category_key),
+            "month": Categorical(),
+        }
+        self.count = 0
+        self.date = np.empty(0, dtype="datetime64[D]")
+        self.amount = np.empty(0, dtype=np.float64)
+        self.codes = {name: np.empty(0, dtype=np.int32) for name in self.categories if name != "investor"}
+        self.investor_codes = np.empty(0, dtype=np.int32)
+        self.investor_rows = np.empty(0, dtype=np.int32)
+        # dimension -> (total_usd, rounds, disclosed_rounds), indexed by category code
+        self.aggregates = {dim: (np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+                           for dim in DIMENSIONS}
+        self.source_offset = 0        # byte offset just past the last ingested CSV row
+        self.source_columns = None    # column name -> CSV field position, from the header
+        self.source_state = None      # (dev, inode, mtime_ns, size) of the CSV at the last refresh
+
+    # ---- ingestion ----
+    def append(self, rows):
+        """Append a chunk of rows (dicts keyed by the COLUMNS values) and update the aggregates."""
+        if not rows:
+            return 0
+        n = len(rows)
+        dates = np.array([parse_date(r.get("date")) for r in rows], dtype="datetime64[D]")
+        amounts = np.array([parse_amount(r.get("amount")) for r in rows], dtype=np.float64)
+        months = [str(d)[:7] if not np.isnat(d) else "unknown" for d in dates]
+
+        with self._lock:
+            new_codes = {
+                "startup": self.categories["startup"].encode([clean_text(r.get("startup")) or "unknown" for r in rows]),
+                "vertical": self.categories["vertical"].encode([clean_text(r.get("vertical")) or "unknown" for r in rows]),
+                "subvertical": self.categories["subvertical"].encode([clean_text(r.get("subvertical")) for r in rows]),
+                "city": self.categories["city"].encode([canonical_city(r.get("city")) or "unknown" for r in rows]),
+                "round_type": self.categories["round_type"].encode([clean_text(r.get("round_type")) or "unknown" for r in rows]),
+                "month": self.categories["month"].encode(months),
+            }
+            inv_codes, inv_rows = [], []
+            investors = self.categories["investor"]
+            for i, r in enumerate(rows):
+                for name in split_investors(r.get("investors")):
+                    inv_codes.append(investors.code(name))
+                    inv_rows.append(self.count + i)
+            inv_codes = np.array(inv_codes, dtype=np.int32)
+            inv_rows = np.array(inv_rows, dtype=np.int32)
+
+            self.date = np.concatenate([self.date, dates])
+            self.amount = np.concatenate([self.amount, amounts])
+            for name, codes in new_codes.items():
+                self.codes[name] = np.concatenate([self.codes[name], codes])
+            self.investor_codes = np.concatenate([self.investor_codes, inv_codes])
+            self.investor_rows = np.concatenate([self.investor_rows, inv_rows])
+
+            # Incremental aggregates: bincount only the new chunk and add it in
+            disclosed = ~np.isnan(amounts)
+            filled = np.where(disclosed, amounts, 0.0)
+            for dim in DIMENSIONS:
+                if dim == "investor":
+                    codes, weights, mask = inv_codes, filled[inv_rows - self.count], disclosed[inv_rows - self.count]
+                else:
+                    codes, weights, mask = new_codes[dim], filled, disclosed
+                self._add_to_aggregate(dim, codes, weights, mask)
+
+            self.count += n
+        return n
+
+    def _add_to_aggregate(self, dim, codes, weights, disclosed):
+        size = len(self.categories[dim])
+        totals, rounds, disclosed_rounds = (self._grow(a, size) for a in self.aggregates[dim])
+        if len(codes):
+            totals += np.bincount(codes, weights=weights, minlength=size)
+            rounds += np.bincount(codes, minlength=size)
+            disclosed_rounds += np.bincount(codes, weights=disclosed, minlength=size).astype(np.int64)
+        self.aggregates[dim] = (totals, rounds, disclosed_rounds)
+
+    @staticmethod
+    def _grow(array, size):
+        if len(array) >= size:
+            return array
+        grown = np.zeros(size, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    # ---- queries ----
+    def _row_mask(self, filters):
+        mask = np.ones(self.count, dtype=bool)
+        for dim, value in (filters or {}).items():
+            if value in (None, ""):
+                continue
+            if dim == "year":
+                mask &= self.date.astype("datetime64[Y]").astype(int) + 1970 == int(value)
+                continue
+            code = self.categories[dim].lookup(canonical_city(value) if dim == "city" else value)
+            if code is None:
+                return np.zeros(self.count, dtype=bool)
+            if dim == "investor":
+                rows = np.zeros(self.count, dtype=bool)
+                rows[self.investor_rows[self.investor_codes == code]] = True
+                mask &= rows
+            else:
+                mask &= self.codes[dim] == code
+        return mask
+
+    def funding_by(self, dimension, top=20, filters=None, sort="total_usd"):
+        """
+        Funding totals grouped by `dimension` (vertical, city, investor, month, round_type).
+        Without filters this reads the precomputed aggregates; with filters
+        (vertical / city / investor / round_type / year) it is one masked bincount.
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dimension!r}, expected one of {DIMENSIONS}")
+        with self._lock:
+            labels = self.categories[dimension].values
+            if not filters or not any(v not in (None, "") for v in filters.values()):
+                totals, rounds, disclosed = self.aggregates[dimension]
+            else:
+                mask = self._row_mask(filters)
+                size = len(labels)
+                filled = np.where(np.isnan(self.amount), 0.0, self.amount)
+                known = ~np.isnan(self.amount)
+                if dimension == "investor":
+                    keep = mask[self.investor_rows]
+                    codes, rows = self.investor_codes[keep], self.investor_rows[keep]
+                    weights, flags = filled[rows], known[rows]
+                else:
+                    codes, weights, flags = self.codes[dimension][mask], filled[mask], known[mask]
+                totals = np.bincount(codes, weights=weights, minlength=size)
+                rounds = np.bincount(codes, minlength=size)
+                disclosed = np.bincount(codes, weights=flags, minlength=size).astype(np.int64)
+
+            if dimension == "month":
+                order = np.argsort(labels)   # chronological
+            else:
+                order = np.argsort(-(totals if sort == "total_usd" else rounds), kind="stable")
+            order = order[rounds[order] > 0]
+            if top and dimension != "month":
+                order = order[:top]
+            return [
+                {
+                    "key": labels[i],
+                    "total_usd": float(totals[i]),
+                    "rounds": int(rounds[i]),
+                    "disclosed_rounds": int(disclosed[i]),
+                }
+                for i in order
+            ]
+
+    def summary(self):
+        with self._lock:
+            valid = self.date[~np.isnat(self.date)]
+            return {
+                "rounds": self.count,
+                "disclosed_rounds": int(np.sum(~np.isnan(self.amount))),
+                "total_usd": float(np.nansum(self.amount)),
+                "startups": len(self.categories["startup"]),
+                "investors": len(self.categories["investor"]),
+                "first_date": str(valid.min()) if len(valid) else None,
+                "last_date": str(valid.max()) if len(valid) else None,
+            }
+
+    # ---- CSV ingestion ----
+    def refresh(self, path=FUNDING_CSV, chunksize=1000):
+        """
+        Ingest rows appended to `path` since the last refresh: the file is read from
+        the byte offset where the previous refresh stopped, so an unchanged or
+        appended-to CSV costs one stat plus the new bytes. A file that shrank or was
+        replaced (new inode) is re-read from scratch and `generation` is bumped.
+        Returns the number of rows appended.
+        """
+        st = os.stat(path)
+        state = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        if state == self.source_state:
+            return 0
+        appended = 0
+        with self._lock:
+            previous = self.source_state
+            if previous is not None and (previous[:2] != state[:2] or st.st_size < self.source_offset):
+                logger.info(f"{path} was rewritten; re-reading it")
+                self._reset()
+                self.generation += 1
+            for end, columns, chunk in iter_funding_chunks(path, chunksize, self.source_offset,
+                                                           self.source_columns, st.st_size):
+                appended += self.append(chunk)
+                self.source_offset, self.source_columns = end, columns
+            self.source_state = state
+        if appended:
+            logger.info(f"Ingested {appended} funding rounds from {path} ({self.count} total)")
+        return appended
+
+
+def iter_funding_chunks(path=FUNDING_CSV, chunksize=1000, start=0, columns=None, end=None):
+    """
+    Stream the CSV bytes [start, end) as (offset, columns, [row dict, ...]) chunks keyed
+    by COLUMNS names, where `offset` is the byte position just past the chunk's last row.
+    At start=0 the header is read and `columns` (name -> field position) built from it;
+    resuming later needs the `columns` returned earlier.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read() if end is None else f.read(max(0, end - start))
+    position = [start]
+
+    def lines():
+        for line in data.splitlines(keepends=True):
+            text = line.decode("utf-8-sig" if position[0] == 0 else "utf-8")
+            position[0] += len(line)
+            yield text
+
+    reader = csv.reader(lines())
+    if columns is None:
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = {COLUMNS[h]: i for i, h in enumerate(header) if h in COLUMNS}
+    chunk = []
+    for record in reader:
+        if record:
+            chunk.append({name: record[i] if i < len(record) else "" for name, i in columns.items()})
+        if len(chunk) >= chunksize:
+            yield position[0], columns, chunk
+            chunk = []
+    yield position[0], columns, chunk
+
+
+def load_funding_store(path=FUNDING_CSV):
+    store = FundingStore()
+    store.refresh(path)
+    return store
@@ -0,0 +1,251 @@
+"""
+Comparable-startup and likely-investor lookup over the funding dataset.
+
+Built on top of a FundingStore (funding_analytics.py) and kept in step with it:
+    - investor -> rounds inverted index
+    - city -> rounds index
+    - TF-IDF postings over each round's "Industry Vertical + SubVertical" text
+A founder profile (domain, location, stage) is scored against every round in
+one vectorized pass; when the store grows only the new rows are indexed.
+"""
+import re
+import logging
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from funding_analytics import canonical_city
+
+logger = logging.getLogger(__name__)
+
+# Signup form domains -> words that show up in the dataset's verticals / subverticals
+DOMAIN_TERMS = {
+    "tech": "technology tech software saas platform app cloud ai analytics",
+    "biotech": "biotech biotechnology pharma pharmaceutical life sciences genomics",
+    "agriculture": "agriculture agritech agri farm farmers farming food dairy",
+    "fintech": "fintech finance financial payments payment lending loans banking wallet insurance",
+    "healthcare": "healthcare health medical hospital clinic diagnostics pharmacy wellness",
+    "services": "services consumer marketplace logistics delivery on-demand",
+}
+
+# Signup form stages -> patterns over the dataset's InvestmentnType labels
+STAGE_ROUNDS = {
+    "idea": r"seed|angel|crowd",
+    "early": r"seed|angel|pre.?series|series\s*a\b",
+    "growth": r"series\s*[abc]\b|venture|private equity",
+    "scaling": r"series\s*[c-h]\b|private equity",
+    "mature": r"series\s*[d-j]\b|private equity|debt|equity|corporate",
+}
+
+CITY_BOOST = 0.15
+STAGE_BOOST = 0.10
+
+_ESCAPE_RE = re.compile(r"\\+x[0-9a-fA-F]{2}|\\+n")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {"and", "of", "for", "the", "a", "an", "in", "on", "to", "with", "based", "online", "platform"}
+
+
+def tokenize(text):
+    text = _ESCAPE_RE.sub(" ", text or "").lower()
+    return [t for t in _TOKEN_RE.findall(text) if t not in STOPWORDS and len(t) > 1]
+
+
+class _GrowingIndex:
+    """key -> row ids, appended incrementally and materialized as int32 arrays on demand."""
+
+    def __init__(self):
+        self._lists = defaultdict(list)
+        self._arrays = {}
+
+    def add(self, key, row):
+        self._lists[key].append(row)
+        self._arrays.pop(key, None)
+
+    def get(self, key):
+        rows = self._arrays.get(key)
+        if rows is None:
+            rows = self._arrays[key] = np.array(self._lists.get(key, ()), dtype=np.int32)
+        return rows
+
+    def __len__(self):
+        return len(self._lists)
+
+
+class FundingIndex:
+    """Lookup indexes over a FundingStore; call update() after the store refreshes."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._reset()
+        self.update()
+
+    def _reset(self):
+        self.generation = self.store.generation
+        self.indexed_rows = 0
+        self.indexed_investor_entries = 0
+
+        self.rows_by_investor = _GrowingIndex()
+        self.rows_by_city = _GrowingIndex()
+
+        # TF-IDF postings: one (term, row, tf) triple per distinct term of a row's text
+        self.vocabulary = {}
+        self._post_terms, self._post_rows, self._post_tf = [], [], []
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self._weights_dirty = True
+
+    # ---- indexing ----
+    def update(self):
+        """Index rows the store gained since the last call. Returns the number of new rows."""
+        store = self.store
+        with self._lock, store._lock:
+            if self.generation != store.generation:
+                # The store re-read a rewritten CSV: its rows and codes are all new
+                self._reset()
+            start, end = self.indexed_rows, store.count
+            if start == end:
+                return 0
+
+            city_codes = store.codes["city"]
+            vertical_codes = store.codes["vertical"]
+            verticals = store.categories["vertical"].values
+            subverticals = store.categories["subvertical"].values
+            subvertical_codes = store.codes["subvertical"]
+
+            new_terms = []
+            for row in range(start, end):
+                self.rows_by_city.add(int(city_codes[row]), row)
+                text = f"{verticals[vertical_codes[row]]} {subverticals[subvertical_codes[row]]}"
+                counts = defaultdict(int)
+                for token in tokenize(text):
+                    counts[self.vocabulary.setdefault(token, len(self.vocabulary))] += 1
+                for term, tf in counts.items():
+                    self._post_terms.append(term)
+                    self._post_rows.append(row)
+                    self._post_tf.append(tf)
+                    new_terms.append(term)
+
+            for entry in range(self.indexed_investor_entries, len(store.investor_codes)):
+                self.rows_by_investor.add(int(store.investor_codes[entry]), int(store.investor_rows[entry]))
+            self.indexed_investor_entries = len(store.investor_codes)
+
+            self.doc_freq = np.concatenate([self.doc_freq, np.zeros(len(self.vocabulary) - len(self.doc_freq), dtype=np.int64)])
+            if new_terms:
+                self.doc_freq += np.bincount(new_terms, minlength=len(self.vocabulary))
+            self.indexed_rows = end
+            self._weights_dirty = True
+        logger.info(f"Indexed {end - start} funding rounds ({end} total, {len(self.vocabulary)} terms)")
+        return end - start
+
+    def _refresh_weights(self):
+        """Recompute idf and row norms (cheap: one pass over the postings arrays)."""
+        if not self._weights_dirty:
+            return
+        self.post_terms = np.array(self._post_terms, dtype=np.int32)
+        self.post_rows = np.array(self._post_rows, dtype=np.int32)
+        self.post_tf = np.array(self._post_tf, dtype=np.float32)
+        n = max(self.indexed_rows, 1)
+        self.idf = (np.log((1 + n) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        weights = self.post_tf * self.idf[self.post_terms]
+        self.row_norms = np.sqrt(np.bincount(self.post_rows, weights=weights ** 2, minlength=self.indexed_rows))
+        # Postings sorted by term so each query term is one contiguous slice
+        order = np.argsort(self.post_terms, kind="stable")
+        self.post_terms, self.post_rows, self.post_tf = self.post_terms[order], self.post_rows[order], self.post_tf[order]
+        self.term_starts = np.searchsorted(self.post_terms, np.arange(len(self.vocabulary) + 1))
+        self._weights_dirty = False
+
+    # ---- lookups ----
+    def text_similarity(self, text):
+        """Cosine TF-IDF similarity of `text` against every indexed round (dense float array)."""
+        self._refresh_weights()
+        scores = np.zeros(self.indexed_rows, dtype=np.float64)
+        counts = defaultdict(int)
+        for token in tokenize(text):
+            term = self.vocabulary.get(token)
+            if term is not None:
+                counts[term] += 1
+        if not counts:
+            return scores
+        query_norm = 0.0
+        for term, tf in counts.items():
+            q_weight = tf * self.idf[term]
+            query_norm += q_weight ** 2
+            lo, hi = self.term_starts[term], self.term_starts[term + 1]
+            np.add.at(scores, self.post_rows[lo:hi], q_weight * self.post_tf[lo:hi] * self.idf[term])
+        nonzero = self.row_norms > 0
+        scores[nonzero] /= self.row_norms[nonzero] * np.sqrt(query_norm)
+        return scores
+
+    def _stage_mask(self, stage):
+        pattern = STAGE_ROUNDS.get((stage or "").strip().lower())
+        mask = np.zeros(self.indexed_rows, dtype=bool)
+        if pattern is None:
+            return mask
+        labels = self.store.categories["round_type"].values
+        wanted = [code for code, label in enumerate(labels) if re.search(pattern, _ESCAPE_RE.sub(" ", label), re.I)]
+        return np.isin(self.store.codes["round_type"][:self.indexed_rows], wanted)
+
+    def score_profile(self, domain=None, location=None, stage=None, text=None):
+        """Relevance of every round to a founder profile: TF-IDF similarity plus city / stage boosts."""
+        query = " ".join(filter(None, [DOMAIN_TERMS.get((domain or "").strip().lower(), domain), text]))
+        scores = self.text_similarity(query)
+        city = self.store.categories["city"].lookup(canonical_city(location)) if location else None
+        if city is not None:
+            rows = self.rows_by_city.get(city)
+            scores[rows[scores[rows] > 0]] += CITY_BOOST
+        stage_mask = self._stage_mask(stage)
+        scores[stage_mask & (scores > 0)] += STAGE_BOOST
+        return scores
+
+    def lookup(self, domain=None, location=None, stage=None, text=None, top=10):
+        """Most similar funded startups and the investors most active among them."""
+        store = self.store
+        with self._lock, store._lock:
+            scores = self.score_profile(domain, location, stage, text)
+            candidates = np.flatnonzero(scores > 0)
+            if not len(candidates):
+                return {"startups": [], "investors": []}
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            # Comparable startups: best-scoring round per startup
+            startup_codes = store.codes["startup"][candidates]
+            _, first = np.unique(startup_codes, return_index=True)
+            best_rows = candidates[np.sort(first)][:top]
+
+            labels = store.categories
+            startups = [
+                {
+                    "startup": labels["startup"].values[store.codes["startup"][row]],
+                    "vertical": labels["vertical"].values[store.codes["vertical"][row]],
+                    "subvertical": labels["subvertical"].values[store.codes["subvertical"][row]],
+                    "city": labels["city"].values[store.codes["city"][row]],
+                    "round_type": labels["round_type"].values[store.codes["round_type"][row]],
+                    "date": None if np.isnat(store.date[row]) else str(store.date[row]),
+                    "amount_usd": None if np.isnan(store.amount[row]) else float(store.amount[row]),
+                    "score": round(float(scores[row]), 4),
+                }
+                for row in best_rows
+            ]
+
+            # Likely investors: relevance summed over the rounds each investor joined
+            entries = self.indexed_investor_entries
+            row_scores = scores[store.investor_rows[:entries]]
+            investor_scores = np.bincount(store.investor_codes[:entries], weights=row_scores,
+                                          minlength=len(labels["investor"]))
+            top_investors = np.argsort(-investor_scores, kind="stable")[:top]
+            investors = []
+            for code in top_investors:
+                if investor_scores[code] <= 0:
+                    break
+                rows = self.rows_by_investor.get(int(code))
+                relevant = rows[scores[rows] > 0]
+                investors.append({
+                    "investor": labels["investor"].values[code],
+                    "score": round(float(investor_scores[code]), 4),
+                    "rounds": int(len(rows)),
+                    "relevant_rounds": int(len(relevant)),
+                    "total_usd": float(np.nansum(store.amount[rows])),
+                    "portfolio": sorted({labels["startup"].values[store.codes["startup"][r]] for r in relevant})[:5],
+                })
+            return {"startups": startups, "investors": investors}
@@ -0,0 +1,171 @@
+"""
+HTTP caching for responses that depend only on the scheme catalog and a few filters.
+
+Each response is keyed on (catalog version, normalized filters): the ETag is
+derived from that key, so it is identical across workers and restarts, and a
+conditional GET whose If-None-Match still matches gets an empty 304. Each
+content-coding gets its own strong validator ("<etag>-gzip", "<etag>-br"),
+as RFC 9110 requires, and any of them revalidates the key. Bodies
+are serialized once and kept, together with their gzip / brotli encodings,
+in a small LRU, so repeat requests for common filter combinations skip both
+the matcher and json.dumps.
+"""
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))
+# Smaller bodies go out uncompressed: the framing overhead outweighs the savings
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def normalize_filters(*values):
+    """Missing, empty and "any" filters all mean no constraint to the matcher, so they share a key."""
+    return tuple(str(value) if value and value != "any" else "any" for value in values)
+
+
+def make_etag(*parts):
+    return hashlib.sha1("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()[:32]
+
+
+def encoded_etag(etag, encoding=None):
+    """Strong validator of the `encoding` variant (None = identity) of a body."""
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def accepted_encoding(accept_encoding):
+    """Best encoding we can produce for an Accept-Encoding header: "br", "gzip" or None."""
+    offered = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class CachedBody:
+    """A serialized JSON body plus lazily built compressed variants."""
+
+    __slots__ = ("etag", "body", "_encoded")
+
+    def __init__(self, etag, body):
+        self.etag = etag
+        self.body = body
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        data = self._encoded.get(encoding)
+        if data is None:
+            if encoding == "br":
+                data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+            else:
+                data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+            self._encoded[encoding] = data
+        return data
+
+
+class ResponseCache:
+    """Thread-safe LRU of CachedBody entries."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, key, build):
+        """Entry for `key`; on a miss `build()` returns the JSON-serializable payload."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        entry = CachedBody(make_etag(*key), body)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+
+def _cache_headers(etag, private):
+    # no-cache = revalidate every time, which is a bodiless 304 while the catalog is unchanged
+    return {
+        "ETag": f'"{etag}"',
+        "Cache-Control": ("private" if private else "public") + ", no-cache",
+        "Vary": ", ".join(["Accept-Encoding"] + (["Cookie"] if private else [])),
+    }
+
+
+def not_modified(key, private=False):
+    """
+    Empty 304 if the current request's If-None-Match holds any encoding's ETag for
+    `key`, else None. The ETag comes from the key alone, so this never builds or
+    looks up the body; callers can check it before any other work.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    etag = make_etag(*key)
+    for encoding in (None, "gzip", "br"):
+        tag = encoded_etag(etag, encoding)
+        if tag in request.if_none_match:
+            return Response(status=304, headers=_cache_headers(tag, private))
+    return None
+
+
+def cached_json_response(key, build, private=False):
+    """
+    JSON response for the current request from the response cache.
+    `key` must capture everything the payload depends on (catalog version first).
+    """
+    response = not_modified(key, private)
+    if response is not None:
+        return response
+
+    entry = response_cache.get_or_build(key, build)
+    body = entry.body
+    encoding = accepted_encoding(request.headers.get("Accept-Encoding")) if len(body) >= COMPRESS_MIN_BYTES else None
+    headers = _cache_headers(encoded_etag(entry.etag, encoding), private)
+    if encoding:
+        body = entry.encoded(encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, status=200, headers=headers, mimetype="application/json")
@@ -0,0 +1,370 @@
+"""
+Timing spans, latency histograms, a Prometheus /metrics endpoint and an
+optional per-request trace log.
+
+    with span("rag_encode"):
+        q_emb = encoder.encode(query)
+
+Every span feeds the app_span_seconds{span=...} histogram and, while a
+request is being traced, that request's trace. Requests themselves go into
+app_request_seconds{endpoint, method, status}; SQLAlchemy statements are
+spans named "db_query". With TRACE_LOG=<path>, one JSON line per request
+(endpoint, status, total time and every span with its offset) is appended
+to that file. psycopg2 connections opened with cursor_factory=timed_cursor_class()
+report their statements as db_query spans too.
+
+METRICS=0 turns all of it off: span() then hands back one shared no-op
+context manager and no hooks are installed.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.environ.get("METRICS", "1") != "0"
+TRACE_LOG = os.environ.get("TRACE_LOG", "")
+
+EXPOSITION_TYPE = "text/plain; version=0.0.4"
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+# ---------------- Histograms ---------------- #
+class Histogram:
+    """Cumulative-bucket latency histogram for one label set."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Registry:
+    """Histogram families keyed by (metric name, sorted label items)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self.help = {
+            "app_span_seconds": "Time spent in instrumented code paths",
+            "app_request_seconds": "HTTP request latency",
+        }
+
+    def observe(self, name, seconds, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self):
+        """Prometheus text exposition of every histogram."""
+        with self._lock:
+            items = sorted((key, list(h.counts), h.sum, h.count) for key, h in self._histograms.items())
+        lines = []
+        seen = set()
+        for (name, labels), counts, total, count in items:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {self.help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, c in zip(list(BUCKETS) + ["+Inf"], counts):
+                cumulative += c
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(items, **extra):
+    pairs = list(items) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+registry = Registry()
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+# ---------------- Spans ---------------- #
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        record(self.name, elapsed, self.start, **self.labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **labels):
+    """Context manager timing a block as span `name`."""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Span(name, labels)
+
+
+def record(name, seconds, started=None, **labels):
+    """Record an already-measured span (e.g. timings collected by ocr_preprocess)."""
+    if not METRICS_ENABLED:
+        return
+    registry.observe("app_span_seconds", seconds, {"span": name, **labels})
+    trace = _trace.get()
+    if trace is not None:
+        offset = (started if started is not None else time.perf_counter() - seconds) - trace["_start"]
+        trace["spans"].append({"span": name, "offset_ms": round(offset * 1000, 3),
+                               "ms": round(seconds * 1000, 3), **labels})
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---------------- Request traces ---------------- #
+_trace_lock = threading.Lock()
+
+
+def start_trace(endpoint, method):
+    """Begin tracing the current request; spans recorded in this context join it."""
+    trace = {"endpoint": endpoint, "method": method, "spans": [], "_start": time.perf_counter()}
+    _trace.set(trace)
+    return trace
+
+
+def finish_trace(trace, status):
+    """Record the request latency and append its trace to TRACE_LOG."""
+    _trace.set(None)
+    seconds = time.perf_counter() - trace.pop("_start")
+    registry.observe("app_request_seconds", seconds,
+                     {"endpoint": trace["endpoint"] or "unknown", "method": trace["method"], "status": str(status)})
+    if TRACE_LOG:
+        trace.update(status=status, ms=round(seconds * 1000, 3), at=time.time())
+        line = json.dumps(trace, default=str)
+        with _trace_lock, open(TRACE_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+# ---------------- Databases ---------------- #
+_sqlalchemy_instrumented = False
+
+
+def statement_verb(statement):
+    if isinstance(statement, bytes):
+        statement = statement.decode("utf-8", "replace")
+    if not isinstance(statement, str) or not statement.strip():
+        return "OTHER"
+    return statement.lstrip().split(None, 1)[0].upper()
+
+
+def instrument_sqlalchemy():
+    """
+    Every statement on every engine becomes a db_query span labelled with its verb.
+    The listeners are global to Engine, so they are registered once per process.
+    """
+    global _sqlalchemy_instrumented
+    if _sqlalchemy_instrumented:
+        return
+    _sqlalchemy_instrumented = True
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        record("db_query", time.perf_counter() - started, started, statement=statement_verb(statement))
+
+    @event.listens_for(Engine, "handle_error")
+    def _query_failed(context):
+        stack = context.connection.info.get("query_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+_timed_cursor = None
+
+
+def timed_cursor_class():
+    """psycopg2 cursor class whose execute() / executemany() calls are db_query spans."""
+    global _timed_cursor
+    if _timed_cursor is None:
+        import psycopg2.extensions
+
+        class _TimedCursor(psycopg2.extensions.cursor):
+            def execute(self, query, vars=None):
+                with span("db_query", statement=statement_verb(query)):
+                    return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                with span("db_query", statement=statement_verb(query)):
+                    return super().executemany(query, vars_list)
+
+        _timed_cursor = _TimedCursor
+    return _timed_cursor
+
+
+# ---------------- LLM ---------------- #
+class TimedLLM:
+    """Wraps the ollama module (or a client) so each chat() call is an llm_chat span."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def chat(self, *args, **kwargs):
+        with span("llm_chat", model=kwargs.get("model", "")):
+            return self._client.chat(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# ---------------- Exposition ---------------- #
+def render_metrics(app):
+    """Span/request histograms plus admission and cache counters, as Prometheus text."""
+    lines = [registry.render().rstrip("\n")]
+    controllers = app.extensions.get("admission") or {}
+    stats = {name: c.stats() for name, c in controllers.items() if name in app.view_functions}
+    if stats:
+        lines += _admission_metrics(stats)
+    caches = {}
+    # Only report caches whose modules the app actually imported
+    for module, attr in (("profiles", "profile_cache"), ("http_cache", "response_cache")):
+        if module in sys.modules:
+            caches[attr] = getattr(sys.modules[module], attr).stats()
+    if caches:
+        lines += ["# HELP app_cache_hits_total Cache hits", "# TYPE app_cache_hits_total counter"]
+        lines += [f"app_cache_hits_total{_labels([('cache', n)])} {s['hits']}" for n, s in caches.items()]
+        lines += ["# HELP app_cache_misses_total Cache misses", "# TYPE app_cache_misses_total counter"]
+        lines += [f"app_cache_misses_total{_labels([('cache', n)])} {s['misses']}" for n, s in caches.items()]
+        lines += ["# HELP app_cache_entries Entries held", "# TYPE app_cache_entries gauge"]
+        lines += [f"app_cache_entries{_labels([('cache', n)])} {s['entries']}" for n, s in caches.items()]
+    return "\n".join(line for line in lines if line) + "\n"
+
+
+def _admission_metrics(stats):
+    lines = []
+    for metric, kind, help_text, field in (
+        ("app_admission_in_flight", "gauge", "Requests running per limited endpoint", "in_flight"),
+        ("app_admission_queue_depth", "gauge", "Requests waiting per limited endpoint", "queue_depth"),
+        ("app_admission_admitted_total", "counter", "Requests admitted", "admitted"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f"{metric}{_labels([('endpoint', name)])} {s[field]}" for name, s in stats.items()]
+    lines += ["# HELP app_admission_rejected_total Requests turned away with 429",
+              "# TYPE app_admission_rejected_total counter"]
+    for name, s in stats.items():
+        for reason, count in s["rejected"].items():
+            lines.append(f"app_admission_rejected_total{_labels([('endpoint', name), ('reason', reason)])} {count}")
+    lines += ["# HELP app_admission_wait_seconds Time spent queued before admission",
+              "# TYPE app_admission_wait_seconds histogram"]
+    for name, s in stats.items():
+        wait = s["wait_seconds"]
+        for bound, count in wait["buckets"].items():
+            lines.append(f"app_admission_wait_seconds_bucket{_labels([('endpoint', name)], le=bound)} {count}")
+        lines.append(f"app_admission_wait_seconds_sum{_labels([('endpoint', name)])} {wait['sum']}")
+        lines.append(f"app_admission_wait_seconds_count{_labels([('endpoint', name)])} {wait['count']}")
+    return lines
+
+
+# ---------------- Flask ---------------- #
+def init_instrumentation(app):
+    """Trace every request, time every DB statement and serve /metrics."""
+    if not METRICS_ENABLED:
+        return
+    from flask import Response, g, request
+
+    instrument_sqlalchemy()
+
+    @app.before_request
+    def start_request_trace():
+        g.trace = start_trace(request.endpoint, request.method)
+
+    @app.after_request
+    def finish_request_trace(response):
+        trace = g.pop("trace", None)
+        if trace is not None:
+            finish_trace(trace, response.status_code)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(render_metrics(app), mimetype=EXPOSITION_TYPE)
+
+    if TRACE_LOG:
+        logger.info(f"Writing request traces to {TRACE_LOG}")
+
+
+# ---------------- Quart (asgi.py) ---------------- #
+def init_instrumentation_quart(app):
+    """init_instrumentation() for the ASGI app (its database goes through asyncpg, not SQLAlchemy)."""
+    if not METRICS_ENABLED:
+        return
+    from quart import Response, g, request
+
+    @app.before_request
+    async def start_request_trace():
+        g.trace = start_trace(request.endpoint, request.method)
+
+    @app.after_request
+    async def finish_request_trace(response):
+        trace = g.pop("trace", None)
+        if trace is not None:
+            finish_trace(trace, response.status_code)
+        return response
+
+    @app.route("/metrics")
+    async def metrics():
+        return Response(render_metrics(app), mimetype=EXPOSITION_TYPE)
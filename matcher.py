@@ -1,14 +1,25 @@
 import json
 
+from instrumentation import timed
+from scheme_catalog import SchemeCatalog
+
+
 def load_schemes(filename):
-    """Load processed schemes from JSON file."""
+    """Load processed schemes from a JSON file or a binary .catalog file."""
+    if filename.endswith(".catalog"):
+        return SchemeCatalog(filename)
     with open(filename, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def match_schemes(schemes, domain=None, registration=None, stage=None):
-    """Filter schemes based on given eligibility."""
+@timed("match_schemes")
+def match_indices(schemes, domain=None, registration=None, stage=None):
+    """Positions (in `schemes`) of the schemes matching the given eligibility."""
+    if isinstance(schemes, SchemeCatalog):
+        # Bitmask filter over the whole catalog
+        return [int(i) for i in schemes.match(domain, registration, stage)]
+
     results = []
-    for scheme in schemes:
+    for i, scheme in enumerate(schemes):
         eligible = True
 
         if domain and domain != "any" and domain not in scheme["eligibility"]["domain"]:
@@ -19,5 +30,18 @@ def match_schemes(schemes, domain=None, registration=None, stage=None):
             eligible = False
 
         if eligible:
-            results.append(scheme)
+            results.append(i)
     return results
+
+
+def schemes_at(schemes, indices):
+    """Scheme dicts for positions returned by match_indices() on the same `schemes`."""
+    if isinstance(schemes, SchemeCatalog):
+        # Only matches get their text decoded (and kept in the catalog's record cache)
+        return schemes.records(indices)
+    return [schemes[i] for i in indices]
+
+
+def match_schemes(schemes, domain=None, registration=None, stage=None):
+    """Filter schemes based on given eligibility."""
+    return schemes_at(schemes, match_indices(schemes, domain, registration, stage))
@@ -1,13 +1,72 @@
-import joblib
+import io
+import os
+import json
+import logging
+
 import pandas as pd
 import numpy as np
-from flask import Flask, request, render_template
+from flask import Flask, Response, request, render_template, jsonify
+
+from predictor import PredictionCache, FEATURES, NUMERIC_FEATURES
+
+logging.basicConfig(level=logging.INFO)
 
-# Load the saved model
-model = joblib.load("startup_success_predictor_v3_optimized.pkl")
+# Load the saved model once and warm it up before serving.
+# MODEL_MMAP=r memory-maps the model's numpy arrays (shared between worker processes).
+# Single predictions go through an LRU cache that resets when the model file changes.
+MODEL_PATH = os.environ.get("MODEL_PATH", "startup_success_predictor_v3_optimized.pkl")
+prediction_cache = PredictionCache(
+    MODEL_PATH,
+    maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", "4096")),
+    mmap_mode=os.environ.get("MODEL_MMAP") or None,
+)
+
+# Rows scored per predict_proba call / per streamed chunk in the batch endpoint
+BATCH_CHUNK_SIZE = 5000
 
 app = Flask(__name__)
 
+
+def score_frame(frame):
+    """
+    Score every row of `frame` with a single predict_proba call.
+    The label is derived from the probability (same decision as model.predict),
+    so the pipeline runs once instead of twice.
+    """
+    proba = prediction_cache.predict_proba_frame(frame)
+    return proba, (proba > 0.5).astype(int)
+
+
+def prepare_frame(frame):
+    """Validate and coerce a batch of startup profiles; raises ValueError on bad input."""
+    missing = [c for c in FEATURES if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    frame = frame.copy()
+    for col in NUMERIC_FEATURES:
+        frame[col] = pd.to_numeric(frame[col], errors="raise")
+    for col in ("country_code", "primary_category"):
+        frame[col] = frame[col].astype(str)
+    return frame
+
+
+def ndjson_lines(ids, proba, labels):
+    """Yield scored rows as NDJSON, BATCH_CHUNK_SIZE rows per yielded chunk."""
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_CHUNK_SIZE):
+        end = start + BATCH_CHUNK_SIZE
+        yield "".join(
+            json.dumps({"id": i, "success_probability": round(float(p), 4), "successful": bool(l)}) + "\n"
+            for i, p, l in zip(ids[start:end], proba[start:end], labels[start:end])
+        )
+
+
+def scored_ids(frame, row_offset=0):
+    if "id" in frame.columns:
+        return frame["id"].tolist()
+    return range(row_offset, row_offset + len(frame))
+
+
 @app.route("/")
 def home():
     return render_template("index.html")
@@ -24,8 +83,8 @@ def predict():
         country_code = request.form["country_code"]
         primary_category = request.form["primary_category"]
 
-        # Create DataFrame for model input
-        input_data = pd.DataFrame([{
+        # Cached single-row fast path (no DataFrame); label derived from the probability
+        prediction_proba = prediction_cache.predict_proba_one({
             "funding_total_usd": funding_total_usd,
             "funding_rounds": funding_rounds,
             "age_in_days": age_in_days,
@@ -33,11 +92,8 @@ def predict():
             "funding_velocity": funding_velocity,
             "country_code": country_code,
             "primary_category": primary_category
-        }])
-
-        # Predict
-        prediction_proba = model.predict_proba(input_data)[0][1]
-        prediction = model.predict(input_data)[0]
+        })
+        prediction = int(prediction_proba > 0.5)
 
         result = "Successful Startup 🚀" if prediction == 1 else "Not Successful ❌"
         return render_template("index.html",
@@ -45,5 +101,64 @@ def predict():
     except Exception as e:
         return render_template("index.html", prediction_text=f"Error: {str(e)}")
 
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Score many startups at once.
+    - JSON: a list of profiles, or {"startups": [...]}; each profile has the FEATURES keys (and optionally "id")
+    - multipart upload: a CSV file in field "file" with the FEATURES columns
+    Responds with NDJSON ({"id", "success_probability", "successful"} per line), streamed in chunks.
+    """
+    try:
+        if "file" in request.files:
+            # CSV: read and score chunk by chunk, so huge portfolios never sit in memory at once
+            upload = request.files["file"]
+            # Take ownership of the spooled upload: Flask closes request files when the view
+            # returns, but the generator below keeps reading from it while the response streams
+            stream, upload.stream = upload.stream, io.BytesIO()
+            try:
+                reader = pd.read_csv(stream, encoding="utf-8-sig", chunksize=BATCH_CHUNK_SIZE)
+                first = next(iter(reader), None)
+                if first is None:
+                    raise ValueError("Empty CSV file")
+                first = prepare_frame(first)
+            except Exception:
+                stream.close()
+                raise
+
+            def generate():
+                frame, row_offset = first, 0
+                try:
+                    while frame is not None:
+                        proba, labels = score_frame(frame)
+                        yield from ndjson_lines(scored_ids(frame, row_offset), proba, labels)
+                        row_offset += len(frame)
+                        frame = next(reader, None)
+                        if frame is not None:
+                            frame = prepare_frame(frame)
+                except (ValueError, TypeError, pd.errors.ParserError) as e:
+                    # Headers are already sent; report the bad chunk in-band
+                    yield json.dumps({"error": str(e)}) + "\n"
+                finally:
+                    stream.close()
+
+            return Response(generate(), mimetype="application/x-ndjson")
+
+        data = request.get_json(silent=True)
+        profiles = data.get("startups") if isinstance(data, dict) else data
+        if not isinstance(profiles, list) or not profiles:
+            return jsonify({"error": "Expected a non-empty list of startup profiles or a CSV upload"}), 400
+        frame = prepare_frame(pd.DataFrame(profiles))
+    except (ValueError, TypeError, pd.errors.ParserError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    # JSON: the whole batch in one vectorized predict_proba call, streamed back in chunks
+    proba, labels = score_frame(frame)
+    return Response(ndjson_lines(scored_ids(frame), proba, labels), mimetype="application/x-ndjson")
+
+@app.route("/predict/cache_stats", methods=["GET"])
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,61 @@
+"""
+Per-request latency of the success predictor: the original pandas path
+(one-row DataFrame, predict_proba + predict) versus the fast single-row path.
+
+Usage (from ml_model/):
+    python bench_predictor.py [--requests 2000]
+"""
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from predictor import SuccessPredictor, WARMUP_PROFILE
+
+
+def timed(fn, n):
+    samples = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples * 1000
+
+
+def report(label, samples):
+    print(f"{label:<32}{np.mean(samples):>9.3f}{np.percentile(samples, 50):>9.3f}{np.percentile(samples, 99):>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Success predictor latency micro-benchmark")
+    parser.add_argument("--model", default="startup_success_predictor_v3_optimized.pkl")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    predictor = SuccessPredictor(args.model)
+    model = predictor.model
+    profile = dict(WARMUP_PROFILE)
+
+    def legacy():
+        frame = pd.DataFrame([profile])
+        model.predict_proba(frame)[0][1]
+        model.predict(frame)[0]
+
+    def single_pass():
+        predictor.predict_proba_frame(pd.DataFrame([profile]))
+
+    def fast():
+        predictor.predict_proba_one(profile)
+
+    print(f"{args.requests} requests, milliseconds per request\n")
+    print(f"{'path':<32}{'mean':>9}{'p50':>9}{'p99':>9}")
+    report("DataFrame, proba + predict", timed(legacy, args.requests))
+    report("DataFrame, proba only", timed(single_pass, args.requests))
+    if predictor.fast is not None:
+        report("fast path (no pandas)", timed(fast, args.requests))
+        assert abs(predictor.fast.predict_proba_one(profile) - predictor.predict_proba_frame(pd.DataFrame([profile]))[0]) < 1e-6
+
+
+if __name__ == "__main__":
+    main()
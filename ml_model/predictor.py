@@ -0,0 +1,254 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns the pipeline was trained on, in order
+FEATURES = [
+    "funding_total_usd", "funding_rounds", "age_in_days", "funding_duration_days",
+    "funding_velocity", "country_code", "primary_category",
+]
+NUMERIC_FEATURES = FEATURES[:5]
+CATEGORICAL_FEATURES = FEATURES[5:]
+
+WARMUP_PROFILE = {
+    "funding_total_usd": 1_000_000.0, "funding_rounds": 2, "age_in_days": 1000,
+    "funding_duration_days": 365, "funding_velocity": 500_000.0,
+    "country_code": "USA", "primary_category": "Software",
+}
+
+
+def _check_log1p(log_pipe):
+    """ValueError unless `log_pipe` is exactly a log1p FunctionTransformer followed by the "scale" step."""
+    names = [name for name, _ in log_pipe.steps]
+    if len(names) != 2 or names[1] != "scale":
+        raise ValueError(f"Unexpected log_scale steps {names}")
+    log_step = log_pipe.steps[0][1]
+    if (getattr(log_step, "func", None) is not np.log1p or log_step.kw_args
+            or getattr(log_step, "inverse_func", None) not in (None, np.expm1)):
+        raise ValueError(f"Fast path only replays log1p, got {log_step!r}")
+
+
+class FastPath:
+    """
+    Single-row inference without pandas or the ColumnTransformer.
+
+    The scaler parameters and one-hot column positions are read out of the fitted
+    pipeline once; a request then becomes a few float ops, two dict lookups and
+    one classifier call on a (1, n_features) array. Pipelines whose steps differ
+    from what transform_one() replays (log1p + StandardScaler, StandardScaler,
+    one-hot) raise ValueError, so the caller keeps the full pipeline.
+    """
+
+    def __init__(self, pipeline):
+        pre = pipeline.named_steps["preprocessor"]
+        self.classifier = pipeline.steps[-1][1]
+
+        transformers = {name: (trans, cols) for name, trans, cols in pre.transformers_}
+        log_pipe, self.log_cols = transformers["log_scale"]
+        log_scaler = log_pipe.named_steps["scale"]
+        std_scaler, self.std_cols = transformers["standard_scale"]
+        _check_log1p(log_pipe)
+        for scaler in (log_scaler, std_scaler):
+            if not (getattr(scaler, "with_mean", False) and getattr(scaler, "with_std", False)):
+                raise ValueError(f"Fast path needs centred and scaled StandardScalers, got {scaler!r}")
+        encoder, cat_cols = transformers["cat"]
+        if list(cat_cols) != CATEGORICAL_FEATURES:
+            raise ValueError(f"Unexpected categorical columns {cat_cols}")
+        remainder = transformers.get("remainder")
+        if remainder and len(remainder[1]):
+            raise ValueError("Pipeline passes through extra columns")
+        if getattr(encoder, "handle_unknown", None) != "ignore":
+            raise ValueError("Fast path needs handle_unknown='ignore'")
+
+        self.log_mean, self.log_scale = log_scaler.mean_, log_scaler.scale_
+        self.std_mean, self.std_scale = std_scaler.mean_, std_scaler.scale_
+
+        # Pre-encoded categorical lookups: value -> output column
+        n_numeric = len(self.log_cols) + len(self.std_cols)
+        self.category_columns = []
+        offset = n_numeric
+        for categories in encoder.categories_:
+            self.category_columns.append({str(c): offset + i for i, c in enumerate(categories)})
+            offset += len(categories)
+        self.n_features = offset
+        self.n_numeric = n_numeric
+
+        # A sparse training matrix means unset one-hot cells were *missing* to the
+        # booster, not 0.0, so the dense row has to mark them as NaN to match.
+        self.fill = np.nan if getattr(pre, "sparse_output_", False) else 0.0
+
+    def transform_one(self, features):
+        row = np.full((1, self.n_features), self.fill, dtype=np.float32)
+        log_values = np.log1p(np.array([float(features[c]) for c in self.log_cols]))
+        std_values = np.array([float(features[c]) for c in self.std_cols])
+        numeric = np.concatenate([
+            (log_values - self.log_mean) / self.log_scale,
+            (std_values - self.std_mean) / self.std_scale,
+        ])
+        if self.fill != 0.0:
+            numeric[numeric == 0.0] = self.fill
+        row[0, :self.n_numeric] = numeric
+        for lookup, col in zip(self.category_columns, CATEGORICAL_FEATURES):
+            index = lookup.get(str(features[col]))
+            if index is not None:   # unknown category -> all zeros, as handle_unknown="ignore"
+                row[0, index] = 1.0
+        return row
+
+    def predict_proba_one(self, features):
+        return float(self.classifier.predict_proba(self.transform_one(features))[0, 1])
+
+
+class SuccessPredictor:
+    """
+    Loads the success-predictor pipeline once, optionally memory-mapping its
+    arrays, and warms it up so the first real request doesn't pay lazy-init costs.
+    """
+
+    def __init__(self, path, mmap_mode=None, warmup=True, fast_path=True):
+        self.path = path
+        started = time.perf_counter()
+        self.model = joblib.load(path, mmap_mode=mmap_mode)
+        self.load_seconds = time.perf_counter() - started
+
+        self.fast = None
+        if fast_path:
+            try:
+                self.fast = FastPath(self.model)
+            except (AttributeError, KeyError, ValueError) as e:
+                logger.warning(f"Fast single-row path disabled, falling back to the full pipeline: {e}")
+
+        if warmup:
+            self.warm_up()
+
+    def warm_up(self):
+        """Run one inference through every path to trigger lazy initialization."""
+        started = time.perf_counter()
+        self.predict_proba_frame(pd.DataFrame([WARMUP_PROFILE]))
+        if self.fast is not None:
+            self.fast.predict_proba_one(WARMUP_PROFILE)
+        logger.info(f"Loaded {self.path} in {self.load_seconds * 1000:.0f}ms, "
+                    f"warm-up took {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def predict_proba_frame(self, frame):
+        """Success probability for every row of a DataFrame (one vectorized call)."""
+        return self.model.predict_proba(frame[FEATURES])[:, 1]
+
+    def predict_proba_one(self, features):
+        """Success probability for one profile dict, using the fast path when available."""
+        if self.fast is not None:
+            return self.fast.predict_proba_one(features)
+        return float(self.predict_proba_frame(pd.DataFrame([features]))[0])
+
+
+def _round_significant(value, digits):
+    value = float(value)
+    if value == 0 or not np.isfinite(value):
+        return value
+    return round(value, digits - 1 - int(np.floor(np.log10(abs(value)))))
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of success probabilities in front of a SuccessPredictor.
+
+    Keys are the normalized feature tuple: money/velocity rounded to
+    `significant_digits`, counts as ints, and categories the model has never
+    seen collapsed into one value (the encoder ignores them anyway). The model
+    file is re-checked every `check_interval` seconds; if it changed, the model
+    is reloaded and the cache emptied.
+    """
+
+    def __init__(self, path, maxsize=4096, significant_digits=4, check_interval=5.0, **predictor_kwargs):
+        self.path = path
+        self.maxsize = maxsize
+        self.significant_digits = significant_digits
+        self.check_interval = check_interval
+        self.predictor_kwargs = predictor_kwargs
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._load()
+
+    def _load(self):
+        self._file_state = self._stat()
+        self.predictor = SuccessPredictor(self.path, **self.predictor_kwargs)
+        self._checked_at = time.monotonic()
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _check_model_file(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if self._stat() != self._file_state:
+            logger.info(f"{self.path} changed on disk; reloading model and clearing prediction cache")
+            self._load()
+            with self._lock:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def normalize(self, features):
+        """Normalized copy of the profile; equal keys always get the same prediction."""
+        fast = self.predictor.fast
+        normalized = {
+            "funding_total_usd": _round_significant(features["funding_total_usd"], self.significant_digits),
+            "funding_rounds": int(features["funding_rounds"]),
+            "age_in_days": int(features["age_in_days"]),
+            "funding_duration_days": int(features["funding_duration_days"]),
+            "funding_velocity": _round_significant(features["funding_velocity"], self.significant_digits),
+        }
+        for i, col in enumerate(CATEGORICAL_FEATURES):
+            value = str(features[col]).strip()
+            if fast is not None and value not in fast.category_columns[i]:
+                value = "__unknown__"
+            normalized[col] = value
+        return normalized
+
+    def predict_proba_one(self, features):
+        self._check_model_file()
+        normalized = self.normalize(features)
+        key = tuple(normalized[c] for c in FEATURES)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        proba = self.predictor.predict_proba_one(normalized)
+
+        with self._lock:
+            self._entries[key] = proba
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return proba
+
+    def predict_proba_frame(self, frame):
+        """Uncached batch scoring, with the same model-file check as single predictions."""
+        self._check_model_file()
+        return self.predictor.predict_proba_frame(frame)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -47,6 +47,32 @@ class Startup(db.Model):
 
     # Relationship to the User model
     owner = db.relationship("User", back_populates="startups")
+    scheme_match = db.relationship("StartupSchemeMatch", uselist=False, back_populates="startup",
+                                   cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
-        return f"<Startup {self.startup_name}>"
\ No newline at end of file
+        return f"<Startup {self.startup_name}>"
+
+
+class StartupSchemeMatch(db.Model):
+    """
+    Materialized scheme-matcher results for one startup: positions of the
+    matching schemes in the catalog at catalog_version (the scheme text is
+    hydrated from the in-memory catalog). Valid while catalog_version and the
+    stored criteria equal the current scheme catalog and the startup's
+    domain / registration_type / stage.
+    """
+    __tablename__ = "startup_scheme_matches"
+
+    startup_id = db.Column(db.Integer, db.ForeignKey("startups.startup_id", ondelete="CASCADE"), primary_key=True)
+    catalog_version = db.Column(db.String(32), nullable=False, index=True)
+    domain = db.Column(db.String(50))
+    registration_type = db.Column(db.String(50))
+    stage = db.Column(db.String(50))
+    scheme_ids = db.Column(db.JSON, nullable=False)
+    computed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    startup = db.relationship("Startup", back_populates="scheme_match")
+
+    def __repr__(self):
+        return f"<StartupSchemeMatch {self.startup_id} @ {self.catalog_version}>"
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Read access to a user's profile (user + startup + materialized scheme matches)
+for the dashboard endpoints.
+
+load_profile() fetches everything in one joined query and returns immutable
+snapshots, which get_profile() keeps in a per-process TTL cache keyed by
+user_id. Commits that touch a User, Startup or StartupSchemeMatch invalidate
+the affected users once the transaction commits; the TTL (PROFILE_CACHE_TTL
+seconds) bounds staleness for writes made by other processes.
+
+Snapshots hold the matched scheme ids, not the schemes, so an entry costs
+about 2-5 KB (mostly the startup's free-text fields) and the default
+PROFILE_CACHE_SIZE of 5000 stays within roughly 10-25 MB per worker.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+
+from models import db, User, Startup, StartupSchemeMatch
+
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", "30"))
+PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", "5000"))
+
+UserInfo = namedtuple("UserInfo", "user_id full_name email")
+StartupInfo = namedtuple(
+    "StartupInfo",
+    "startup_id startup_name domain registration_type stage funding_amount team_size "
+    "location website problem_statement vision",
+)
+# Same attribute names as StartupSchemeMatch, so scheme_matches.is_fresh() accepts either
+MatchInfo = namedtuple("MatchInfo", "catalog_version domain registration_type stage scheme_ids")
+Profile = namedtuple("Profile", "user startup matches")
+
+
+class ProfileCache:
+    """Thread-safe TTL + LRU cache of Profile snapshots keyed by user_id."""
+
+    def __init__(self, ttl_seconds=30, max_entries=5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # user_id -> (expires_at, profile)
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_load(self, user_id, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        profile = loader(user_id)
+
+        with self._lock:
+            # Skip the store if an invalidation ran while we were loading: our copy may predate it
+            if profile is not None and generation == self._generation and self.ttl_seconds > 0:
+                self._entries[user_id] = (time.monotonic() + self.ttl_seconds, profile)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return profile
+
+    def invalidate(self, user_ids=None):
+        """Drop the given users (every user if None)."""
+        with self._lock:
+            self._generation += 1
+            if user_ids is None:
+                self._entries.clear()
+            else:
+                for user_id in user_ids:
+                    self._entries.pop(user_id, None)
+
+    def stats(self):
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+profile_cache = ProfileCache(PROFILE_CACHE_TTL, PROFILE_CACHE_SIZE)
+
+
+def load_profile(user_id):
+    """Profile snapshot for `user_id` in one query, or None if the user does not exist."""
+    user = (db.session.query(User)
+            .options(joinedload(User.startups).joinedload(Startup.scheme_match))
+            .filter(User.user_id == user_id)
+            .first())
+    if user is None:
+        return None
+
+    startup = matches = None
+    if user.startups:
+        # Users have one startup in practice; the oldest wins, as with filter_by(...).first()
+        row = min(user.startups, key=lambda s: s.startup_id)
+        startup = StartupInfo(*(getattr(row, field) for field in StartupInfo._fields))
+        if row.scheme_match is not None:
+            match = row.scheme_match
+            matches = MatchInfo(match.catalog_version, match.domain, match.registration_type, match.stage,
+                                tuple(match.scheme_ids))
+    return Profile(UserInfo(user.user_id, user.full_name, user.email), startup, matches)
+
+
+def get_profile(user_id):
+    """Cached load_profile()."""
+    return profile_cache.get_or_load(user_id, load_profile)
+
+
+def invalidate_profile(user_id):
+    profile_cache.invalidate([user_id])
+
+
+# ---------------- Invalidation ---------------- #
+def _affected_user_id(obj):
+    if isinstance(obj, (User, Startup)):
+        return obj.user_id
+    if isinstance(obj, StartupSchemeMatch):
+        # Only follow an already-loaded relationship; never emit SQL inside a flush
+        startup = obj.__dict__.get("startup")
+        if startup is not None:
+            return startup.user_id
+        return -1   # owner unknown: drop the whole cache
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_profile_writes(session, flush_context):
+    pending = session.info.setdefault("profile_writes", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        user_id = _affected_user_id(obj)
+        if user_id is not None:
+            pending.add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_profiles(session):
+    pending = session.info.pop("profile_writes", None)
+    if pending:
+        profile_cache.invalidate(None if -1 in pending else pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_profile_writes(session):
+    session.info.pop("profile_writes", None)
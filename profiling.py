@@ -0,0 +1,206 @@
+"""
+On-demand profiling of a running worker, for admins only.
+
+    GET /_profile?seconds=10[&interval=0.005][&idle=1]
+        Samples every thread's Python stack for `seconds` and returns the
+        counts as collapsed stacks ("thread;outer;...;inner count" per line),
+        ready for flamegraph.pl or speedscope.
+    <any request>?profile=1
+        Runs that one request under cProfile and returns its stats as text
+        instead of the normal response ([&profile_sort=cumulative][&profile_limit=60]).
+
+Both are off unless PROFILING_TOKEN is set, in which case callers must send
+it as "Authorization: Bearer <token>" (or X-Profile-Token). Off means no
+routes and no request hooks are installed.
+"""
+import io
+import os
+import sys
+import hmac
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+
+MAX_SECONDS = 60.0
+DEFAULT_INTERVAL = 0.005
+MIN_INTERVAL = 0.001
+# Leaf frames of threads that are parked, not working; dropped unless idle=1
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socketserver.py", "serve_forever"),
+    ("base_events.py", "_run_once"),
+}
+
+
+# ---------------- Sampling profiler ---------------- #
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples sys._current_frames() from the calling thread; one run at a time."""
+
+    def __init__(self):
+        self._busy = threading.Lock()
+
+    def sample(self, seconds, interval=DEFAULT_INTERVAL, include_idle=False):
+        """
+        Collapsed stacks ("thread;frame;...;frame count" lines, root first) for
+        `seconds` of sampling, or None when another run is in progress.
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            counts = Counter()
+            samples = self._run(counts, min(seconds, MAX_SECONDS), max(interval, MIN_INTERVAL), include_idle)
+        finally:
+            self._busy.release()
+        logger.info(f"Sampled {samples} times over {seconds:g}s, {len(counts)} distinct stacks")
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def _run(self, counts, seconds, interval, include_idle):
+        own = {threading.get_ident()}
+        deadline = time.perf_counter() + seconds
+        samples = 0
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident in own:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if not include_idle and leaf in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack)).replace("\n", " ")] += 1
+            samples += 1
+            time.sleep(interval)
+        return samples
+
+
+sampler = SamplingProfiler()
+
+
+def sample_args(args):
+    """(seconds, interval, include_idle) from query args; ValueError if malformed."""
+    seconds = float(args.get("seconds", 10))
+    interval = float(args.get("interval", DEFAULT_INTERVAL))
+    if not 0 < seconds <= MAX_SECONDS or interval <= 0:
+        raise ValueError(f"seconds must be in (0, {MAX_SECONDS:g}] and interval > 0")
+    return seconds, interval, args.get("idle") == "1"
+
+
+# ---------------- Per-request cProfile ---------------- #
+def start_request_profile():
+    """Enabled cProfile.Profile, or None if another profiler already owns this thread."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        logger.warning("profile=1 ignored: another profiler is active")
+        return None
+    return profile
+
+
+def request_profile_report(profile, args, status):
+    profile.disable()
+    out = io.StringIO()
+    out.write(f"# response status {status}\n")
+    stats = pstats.Stats(profile, stream=out)
+    sort = args.get("profile_sort", "cumulative")
+    try:
+        stats.sort_stats(sort)
+    except KeyError:
+        stats.sort_stats("cumulative")
+    limit = args.get("profile_limit", "60")
+    stats.print_stats(int(limit) if limit.isdigit() else 60)
+    return out.getvalue()
+
+
+def authorized(headers):
+    supplied = headers.get("X-Profile-Token", "")
+    auth = headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        supplied = auth[len("Bearer "):]
+    return bool(supplied) and hmac.compare_digest(supplied.encode(), PROFILING_TOKEN.encode())
+
+
+# ---------------- Flask ---------------- #
+def init_profiling(app):
+    """Register /_profile and ?profile=1 when PROFILING_TOKEN is set."""
+    if not PROFILING_TOKEN:
+        return
+    from flask import Response, g, jsonify, request
+
+    @app.route("/_profile")
+    def sample_profile():
+        if not authorized(request.headers):
+            return jsonify({"error": "Forbidden"}), 403
+        try:
+            seconds, interval, include_idle = sample_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        stacks = sampler.sample(seconds, interval, include_idle)
+        if stacks is None:
+            return jsonify({"error": "A profile is already running"}), 409
+        return Response(stacks, mimetype="text/plain")
+
+    @app.before_request
+    def profile_request():
+        if request.args.get("profile") == "1" and authorized(request.headers):
+            g.request_profile = start_request_profile()
+
+    @app.after_request
+    def profile_report(response):
+        profile = g.pop("request_profile", None)
+        if profile is None:
+            return response
+        report = request_profile_report(profile, request.args, response.status_code)
+        return Response(report, mimetype="text/plain")
+
+    @app.teardown_request
+    def stop_request_profile(exc):
+        # The view raised, so after_request never ran: don't leave the thread profiled
+        profile = g.pop("request_profile", None)
+        if profile is not None:
+            profile.disable()
+
+    logger.info("Profiling enabled at /_profile and ?profile=1")
+
+
+# ---------------- Quart (asgi.py) ---------------- #
+def init_profiling_quart(app):
+    """
+    /_profile for the ASGI app; sampling runs in a thread so the event loop keeps serving.
+    (No ?profile=1: cProfile on the loop thread would charge every task's work to the request.)
+    """
+    if not PROFILING_TOKEN:
+        return
+    import asyncio
+    from quart import Response, jsonify, request
+
+    @app.route("/_profile")
+    async def sample_profile():
+        if not authorized(request.headers):
+            return jsonify({"error": "Forbidden"}), 403
+        try:
+            seconds, interval, include_idle = sample_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        stacks = await asyncio.to_thread(sampler.sample, seconds, interval, include_idle)
+        if stacks is None:
+            return jsonify({"error": "A profile is already running"}), 409
+        return Response(stacks, mimetype="text/plain")
@@ -1,8 +1,16 @@
+import os
+import time
+
 import psycopg2
-import numpy as np
 from sentence_transformers import SentenceTransformer
 import ollama
 
+from answer_cache import SemanticAnswerCache
+from embedding_snapshot import open_snapshot
+from instrumentation import span
+from services import RAG_SNAPSHOT_PATH
+from vector_store import PostgresVectorStore, SnapshotVectorStore
+
 # -----------------------------
 # Database Connection
 # -----------------------------
@@ -19,36 +27,78 @@ cur = conn.cursor()
 # -----------------------------
 embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 
-def cosine(a, b):
-    a, b = np.array(a), np.array(b)
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+# Sections are searched in the memory-mapped legal_docs snapshot if one has been
+# exported, otherwise in legal_docs itself; either way hits are keyed on doc_id
+snapshot = open_snapshot(RAG_SNAPSHOT_PATH)
+store = (SnapshotVectorStore(snapshot, key_column="doc_id") if snapshot is not None
+         else PostgresVectorStore(conn, key_column="doc_id"))
 
 # -----------------------------
-# Retriever
+# Semantic Answer Cache
 # -----------------------------
-def retrieve_relevant_context(query, top_k=5):
-    query_vec = embedder.encode(query).tolist()
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.9")),
+    ttl_seconds=int(os.environ.get("ANSWER_CACHE_TTL", "3600")),
+)
+
+# How often (seconds) to re-check legal_docs for changes
+DOCS_VERSION_CHECK_INTERVAL = 30
+_docs_version_checked_at = 0.0
+
+
+def legal_docs_version():
+    """Cheap fingerprint of legal_docs; changes whenever rows are added, removed or edited."""
+    cur.execute(
+        "SELECT COUNT(*), md5(string_agg(doc_id::text || md5(content), ',' ORDER BY id)) FROM legal_docs"
+    )
+    return cur.fetchone()
+
+
+def refresh_answer_cache():
+    """Invalidate cached answers if legal_docs changed since the last check."""
+    global _docs_version_checked_at
+    now = time.monotonic()
+    if now - _docs_version_checked_at < DOCS_VERSION_CHECK_INTERVAL:
+        return
+    answer_cache.check_version(legal_docs_version())
+    _docs_version_checked_at = now
 
-    cur.execute("SELECT doc_id, section, content, embedding FROM legal_docs")
-    rows = cur.fetchall()
 
-    scored = []
-    for row in rows:
-        sim = cosine(query_vec, row[3])
-        scored.append((sim, row))
+# -----------------------------
+# Retriever
+# -----------------------------
+def retrieve_relevant_docs(query_vec, top_k=5):
+    """Return the top_k (similarity, row) pairs for an already-encoded query."""
+    return [(score, (doc_id, section, content, None))
+            for score, doc_id, section, content in store.search(query_vec, top_k)]
 
-    top_results = sorted(scored, key=lambda x: x[0], reverse=True)[:top_k]
 
-    context = "\n\n".join(
+def format_context(top_results):
+    return "\n\n".join(
         [f"[{r[1][0]} - {r[1][1]}]\n{r[1][2][:500]}..." for r in top_results]
     )
-    return context
+
+
+def retrieve_relevant_context(query, top_k=5):
+    query_vec = embedder.encode(query).tolist()
+    return format_context(retrieve_relevant_docs(query_vec, top_k))
 
 # -----------------------------
 # LLM Query (Ollama Mistral)
 # -----------------------------
 def ask_legal_assistant(query):
-    context = retrieve_relevant_context(query)
+    refresh_answer_cache()
+
+    query_vec = embedder.encode(query)
+    top_results = retrieve_relevant_docs(query_vec.tolist())
+    doc_ids = [r[1][0] for r in top_results]
+
+    # Reworded repeats of a question with the same context skip the LLM call
+    cached = answer_cache.get(query_vec, doc_ids)
+    if cached is not None:
+        return cached
+
+    context = format_context(top_results)
 
     prompt = f"""
 You are a Startup Legal Assistant.
@@ -61,15 +111,18 @@ User Question: {query}
 Give a clear, concise, legal answer with references to the context.
 """
 
-    response = ollama.chat(
-        model="mistral",
-        messages=[
-            {"role": "system", "content": "You are a helpful legal assistant."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-
-    return response["message"]["content"]
+    with span("llm_chat", model="mistral"):
+        response = ollama.chat(
+            model="mistral",
+            messages=[
+                {"role": "system", "content": "You are a helpful legal assistant."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+    answer = response["message"]["content"]
+    answer_cache.put(query_vec, doc_ids, answer)
+    return answer
 
 # -----------------------------
 # Main
@@ -1,8 +1,15 @@
+import os
+import sys
+
 from flask import Flask, request, jsonify
 import psycopg2
-import numpy as np
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from embedding_snapshot import open_snapshot  # noqa: E402
+from services import RAG_SNAPSHOT_PATH  # noqa: E402
+from vector_store import PostgresVectorStore, SnapshotVectorStore  # noqa: E402
+
 app = Flask(__name__)
 model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 conn = psycopg2.connect(
@@ -11,20 +18,17 @@ conn = psycopg2.connect(
     user="postgres",
     password="300234"
 )
-cur = conn.cursor()
-
-def cosine(a,b):
-    a,b = np.array(a), np.array(b)
-    return np.dot(a,b)/(np.linalg.norm(a)*np.linalg.norm(b))
+# Memory-mapped legal_docs snapshot if one has been exported, else legal_docs itself
+snapshot = open_snapshot(RAG_SNAPSHOT_PATH)
+store = (SnapshotVectorStore(snapshot, key_column="doc_id") if snapshot is not None
+         else PostgresVectorStore(conn, key_column="doc_id"))
 
 @app.route("/ask", methods=["POST"])
 def ask():
     query = request.json.get("query")
     query_vec = model.encode(query)
-    cur.execute("SELECT doc_id, section, content, embedding FROM legal_docs")
-    rows = cur.fetchall()
-    top = sorted([(cosine(query_vec,row[3]), row) for row in rows], key=lambda x:x[0], reverse=True)[:5]
-    results = [{"doc_id":r[1][0], "section":r[1][1], "content":r[1][2][:500]} for r in top]
+    top = store.search(query_vec, top_k=5)
+    results = [{"doc_id":hit.doc_id, "section":hit.section, "content":hit.content[:500]} for hit in top]
     return jsonify({"answer":"Top matching sections","results":results})
 
 if __name__=="__main__":
@@ -1,8 +1,15 @@
+import os
+import sys
+
 import psycopg2
-import numpy as np
 from sentence_transformers import SentenceTransformer
 import ollama
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from embedding_snapshot import open_snapshot  # noqa: E402
+from services import RAG_SNAPSHOT_PATH  # noqa: E402
+from vector_store import PostgresVectorStore, SnapshotVectorStore  # noqa: E402
+
 # Load embedding model
 model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
 
@@ -14,27 +21,17 @@ conn = psycopg2.connect(
     host="localhost",
     port="5432"
 )
-cur = conn.cursor()
+# Memory-mapped legal_docs snapshot if one has been exported, else legal_docs itself
+snapshot = open_snapshot(RAG_SNAPSHOT_PATH)
+store = (SnapshotVectorStore(snapshot, key_column="id") if snapshot is not None
+         else PostgresVectorStore(conn, key_column="id"))
 
 def search_and_rerank(query, top_k=3, model_name="mistral"):  # Use smaller model by default
     # Embed query
-    query_embedding = model.encode([query])[0].tolist()
-
-    # Fetch docs
-    cur.execute("SELECT id, section, content, embedding FROM legal_docs;")
-    rows = cur.fetchall()
-
-    docs = []
-    for row in rows:
-        doc_id, section, content, embedding = row
-        if embedding is None:
-            continue
-        # Cosine similarity
-        sim = np.dot(query_embedding, embedding) / (np.linalg.norm(query_embedding) * np.linalg.norm(embedding))
-        docs.append((sim, section, content))
-
-    # Sort and keep top-k
-    top_docs = sorted(docs, key=lambda x: x[0], reverse=True)[:top_k]
+    query_embedding = model.encode([query])[0]
+
+    # Top-k sections by cosine similarity
+    top_docs = [(hit.score, hit.section, hit.content) for hit in store.search(query_embedding, top_k)]
     print("\n🔹 Top 3 relevant sections:")
     for i, (sim, sec, txt) in enumerate(top_docs, start=1):
         print(f"\n{i}. Section: {sec}\nSimilarity: {sim:.4f}\nContent: {txt[:200]}...")
@@ -0,0 +1,327 @@
+"""
+Compact binary form of startup_schemes_final.json.
+
+Layout (all little-endian, every section 64-byte aligned):
+
+    header   : magic, format version, count, section offsets, crc32
+    vocab    : utf-8 JSON {"domain": [...], "registration": [...], "stage": [...]}
+    masks    : uint64[3, count]      eligibility bitmask per field (bit i = vocab[field][i])
+    offsets  : uint64[4 * count + 1] field j of scheme i = blob[o[4i+j]:o[4i+j+1]]
+    blob     : utf-8 text; name and link as-is, benefits and raw_eligibility as JSON lists
+
+The matcher only touches the bitmasks; scheme text is decoded when a matched
+scheme is first returned and the decoded dict is kept (LRU of
+SCHEME_RECORD_CACHE entries), so repeated matches cost what the in-memory
+JSON list does. Built by scraper/scrap.py
+next to the JSON output, or by hand:
+
+    python scheme_catalog.py build startup_schemes_final.json startup_schemes_final.catalog
+    python scheme_catalog.py verify startup_schemes_final.catalog
+"""
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import logging
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+from atomic_files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SCHCAT\x00\x00"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+ELIGIBILITY_FIELDS = ("domain", "registration", "stage")
+TEXT_FIELDS = ("name", "link", "benefits", "raw_eligibility")
+JSON_FIELDS = {"benefits", "raw_eligibility"}
+# Decoded scheme dicts kept per catalog; covers the whole catalog at realistic sizes
+SCHEME_RECORD_CACHE = int(os.environ.get("SCHEME_RECORD_CACHE", "16384"))
+
+# magic, version, count, vocab, vocab_size, masks, offsets, blob, blob_size, crc32
+HEADER = struct.Struct("<8sIQQQQQQQI")
+
+
+class CatalogError(Exception):
+    pass
+
+
+def _align(pos):
+    return (pos + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_catalog(path, schemes):
+    """Write `schemes` (dicts as in startup_schemes_final.json) to a catalog file atomically."""
+    count = len(schemes)
+    vocab = {field: [] for field in ELIGIBILITY_FIELDS}
+    codes = {field: {} for field in ELIGIBILITY_FIELDS}
+    masks = np.zeros((len(ELIGIBILITY_FIELDS), count), dtype=np.uint64)
+    for i, scheme in enumerate(schemes):
+        eligibility = scheme.get("eligibility") or {}
+        for f, field in enumerate(ELIGIBILITY_FIELDS):
+            for value in eligibility.get(field) or []:
+                code = codes[field].get(value)
+                if code is None:
+                    code = codes[field][value] = len(vocab[field])
+                    vocab[field].append(value)
+                    if code >= 64:
+                        raise CatalogError(f"More than 64 distinct {field} values")
+                masks[f, i] |= np.uint64(1 << code)
+
+    offsets = np.zeros(len(TEXT_FIELDS) * count + 1, dtype=np.uint64)
+    chunks = []
+    pos = 0
+    for i, scheme in enumerate(schemes):
+        for j, field in enumerate(TEXT_FIELDS):
+            value = scheme.get(field)
+            if field in JSON_FIELDS:
+                text = json.dumps(value or [], ensure_ascii=False)
+            else:
+                text = value or ""
+            data = text.encode("utf-8")
+            offsets[len(TEXT_FIELDS) * i + j] = pos
+            chunks.append(data)
+            pos += len(data)
+    offsets[-1] = pos
+    blob = b"".join(chunks)
+    vocab_bytes = json.dumps(vocab, ensure_ascii=False).encode("utf-8")
+
+    vocab_off = _align(HEADER.size)
+    masks_off = _align(vocab_off + len(vocab_bytes))
+    offsets_off = _align(masks_off + masks.nbytes)
+    blob_off = _align(offsets_off + offsets.nbytes)
+
+    crc = zlib.crc32(vocab_bytes)
+    for part in (masks, offsets):
+        crc = zlib.crc32(part.tobytes(), crc)
+    crc = zlib.crc32(blob, crc)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, count, vocab_off, len(vocab_bytes),
+                         masks_off, offsets_off, blob_off, len(blob), crc)
+
+    with atomic_write(path, "wb") as f:
+        for offset, data in ((0, header), (vocab_off, vocab_bytes), (masks_off, masks.tobytes()),
+                             (offsets_off, offsets.tobytes()), (blob_off, blob)):
+            f.seek(offset)
+            f.write(data)
+    return count
+
+
+class SchemeRecord:
+    """One scheme of a catalog; text fields are decoded on first access."""
+
+    __slots__ = ("_catalog", "_index", "_fields")
+
+    def __init__(self, catalog, index):
+        self._catalog = catalog
+        self._index = index
+        self._fields = {}
+
+    def _field(self, name):
+        value = self._fields.get(name)
+        if value is None:
+            value = self._fields[name] = self._catalog.field(self._index, name)
+        return value
+
+    @property
+    def name(self):
+        return self._field("name")
+
+    @property
+    def link(self):
+        return self._field("link")
+
+    @property
+    def benefits(self):
+        return self._field("benefits")
+
+    @property
+    def raw_eligibility(self):
+        return self._field("raw_eligibility")
+
+    @property
+    def eligibility(self):
+        return self._catalog.eligibility(self._index)
+
+    def __getitem__(self, key):
+        # Dict-style access, so code written against the JSON schemes keeps working
+        if key == "eligibility" or key in TEXT_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "benefits": self.benefits,
+            "link": self.link,
+            "eligibility": self.eligibility,
+            "raw_eligibility": self.raw_eligibility,
+        }
+
+
+class SchemeCatalog:
+    """Read-only, memory-mapped scheme catalog."""
+
+    def __init__(self, path, record_cache_size=None):
+        self.path = path
+        if record_cache_size is None:
+            record_cache_size = SCHEME_RECORD_CACHE
+        with open(path, "rb") as f:
+            raw = f.read(HEADER.size)
+            if len(raw) < HEADER.size:
+                raise CatalogError(f"{path}: file too short for a catalog header")
+            (magic, version, self.count, vocab_off, vocab_size, masks_off, offsets_off,
+             blob_off, blob_size, self.crc32) = HEADER.unpack(raw)
+            if magic != MAGIC:
+                raise CatalogError(f"{path}: not a scheme catalog")
+            if version != FORMAT_VERSION:
+                raise CatalogError(f"{path}: unsupported catalog version {version}")
+            f.seek(vocab_off)
+            self._vocab_bytes = f.read(vocab_size)
+        self.vocab = json.loads(self._vocab_bytes.decode("utf-8"))
+        self.codes = {field: {v: i for i, v in enumerate(values)} for field, values in self.vocab.items()}
+        # Content version: changes whenever any scheme or its eligibility changes
+        self.version = f"{self.crc32:08x}"
+
+        # One read-only mapping shared by the NumPy views (vectorized matching) and
+        # memoryviews (cheap per-scheme scalar access while decoding results)
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b""
+        n_offsets = len(TEXT_FIELDS) * self.count + 1
+        if self.count:
+            self.masks = np.frombuffer(self._mm, dtype=np.uint64, count=len(ELIGIBILITY_FIELDS) * self.count,
+                                       offset=masks_off).reshape(len(ELIGIBILITY_FIELDS), self.count)
+            self.offsets = np.frombuffer(self._mm, dtype=np.uint64, count=n_offsets, offset=offsets_off)
+            self.blob = np.frombuffer(self._mm, dtype=np.uint8, count=blob_size, offset=blob_off)
+            self._mask_values = memoryview(self._mm)[masks_off:masks_off + self.masks.nbytes].cast("Q")
+            self._offset_values = memoryview(self._mm)[offsets_off:offsets_off + self.offsets.nbytes].cast("Q")
+        else:
+            self.masks = np.zeros((len(ELIGIBILITY_FIELDS), 0), dtype=np.uint64)
+            self.offsets = np.zeros(n_offsets, dtype=np.uint64)
+            self.blob = np.zeros(0, dtype=np.uint8)
+        self._blob_off = blob_off
+        self._eligibility = {}   # mask triple -> decoded eligibility dict (few distinct combinations)
+        self.record = lru_cache(maxsize=record_cache_size)(self._decode_record)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return SchemeRecord(self, i)
+
+    def __iter__(self):
+        return (SchemeRecord(self, i) for i in range(self.count))
+
+    def _decode_record(self, i):
+        return SchemeRecord(self, i).to_dict()
+
+    def records(self, indices):
+        """
+        Scheme dicts for the given indices, decoded once and then served from the
+        record cache. Like the dicts of a loaded JSON list, they are shared: don't mutate.
+        """
+        record = self.record
+        return [record(int(i)) for i in indices]
+
+    def field(self, i, name):
+        j = len(TEXT_FIELDS) * i + TEXT_FIELDS.index(name)
+        start = self._blob_off + self._offset_values[j]
+        text = self._mm[start:self._blob_off + self._offset_values[j + 1]].decode("utf-8")
+        return json.loads(text) if name in JSON_FIELDS else text
+
+    def eligibility(self, i):
+        key = tuple(self._mask_values[f * self.count + i] for f in range(len(ELIGIBILITY_FIELDS)))
+        decoded = self._eligibility.get(key)
+        if decoded is None:
+            decoded = self._eligibility[key] = {
+                field: [v for code, v in enumerate(self.vocab[field]) if key[f] >> code & 1]
+                for f, field in enumerate(ELIGIBILITY_FIELDS)
+            }
+        # Copy, so callers can't mutate the shared entry
+        return {field: list(values) for field, values in decoded.items()}
+
+    def match(self, domain=None, registration=None, stage=None):
+        """Indices of schemes eligible for the given criteria (None / "any" = no constraint)."""
+        keep = np.ones(self.count, dtype=bool)
+        for f, (field, value) in enumerate(zip(ELIGIBILITY_FIELDS, (domain, registration, stage))):
+            if not value or value == "any":
+                continue
+            code = self.codes[field].get(value)
+            if code is None:
+                return np.zeros(0, dtype=np.int64)
+            keep &= (self.masks[f] & np.uint64(1 << code)) != 0
+        return np.flatnonzero(keep)
+
+    def verify(self):
+        """Raise CatalogError if the catalog is corrupt."""
+        crc = zlib.crc32(self._vocab_bytes)
+        for part in (self.masks, self.offsets, self.blob):
+            crc = zlib.crc32(np.ascontiguousarray(part).tobytes(), crc)
+        if crc != self.crc32:
+            raise CatalogError(f"{self.path}: checksum mismatch")
+        if self.count and int(self.offsets[-1]) != len(self.blob):
+            raise CatalogError(f"{self.path}: offsets table does not cover the text blob")
+        if np.any(np.diff(self.offsets.astype(np.int64)) < 0):
+            raise CatalogError(f"{self.path}: offsets table is not monotonic")
+
+
+def open_catalog(path):
+    """Open the catalog at `path`, or return None if it is missing or unreadable."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        catalog = SchemeCatalog(path)
+        logger.info(f"Loaded scheme catalog {path} ({catalog.count} schemes)")
+        return catalog
+    except (CatalogError, OSError, ValueError) as e:
+        logger.error(f"Ignoring scheme catalog {path}: {e}")
+        return None
+
+
+def catalog_path_for(json_path):
+    return f"{os.path.splitext(json_path)[0]}.catalog"
+
+
+# ---------------- CLI ---------------- #
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Build / verify binary scheme catalogs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Convert a schemes JSON file into a catalog")
+    build.add_argument("json_path")
+    build.add_argument("path", nargs="?", help="output (default: JSON path with .catalog)")
+    verify = sub.add_parser("verify", help="Check a catalog file for corruption")
+    verify.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.json_path, "r", encoding="utf-8") as f:
+            schemes = json.load(f)
+        path = args.path or catalog_path_for(args.json_path)
+        count = write_catalog(path, schemes)
+        logging.info(f"Wrote {count} schemes to {path}")
+        return 0
+
+    try:
+        catalog = SchemeCatalog(args.path)
+        catalog.verify()
+    except CatalogError as e:
+        logging.error(str(e))
+        return 1
+    logging.info(f"{args.path}: version {FORMAT_VERSION}, {catalog.count} schemes, "
+                 + ", ".join(f"{len(v)} {k} values" for k, v in catalog.vocab.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
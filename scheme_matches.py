@@ -0,0 +1,109 @@
+"""
+Per-startup scheme matches, materialized in startup_scheme_matches.
+
+A startup's matches are computed when it signs up (or its profile changes)
+and stored as scheme positions with the catalog version they were computed
+against, so the dashboard reads one small row instead of re-running the
+matcher and hydrates the schemes from the in-memory catalog. A row is stale
+when the catalog version or the startup's criteria no longer match; stale
+rows are recomputed on read, or for every startup at once with
+
+    flask --app app match recompute [--all]
+"""
+import json
+import zlib
+import logging
+from datetime import datetime, timezone
+
+from models import db, Startup, StartupSchemeMatch
+from matcher import match_indices, schemes_at
+from scheme_catalog import SchemeCatalog
+
+logger = logging.getLogger(__name__)
+
+
+def catalog_version(schemes):
+    """Content version of a scheme catalog: the .catalog checksum, or a crc32 of the JSON schemes."""
+    if isinstance(schemes, SchemeCatalog):
+        return schemes.version
+    return f"{zlib.crc32(json.dumps(schemes, sort_keys=True).encode('utf-8')):08x}"
+
+
+def criteria_of(startup):
+    return (startup.domain, startup.registration_type, startup.stage)
+
+
+def is_fresh(row, startup, version):
+    return (row is not None and row.catalog_version == version
+            and (row.domain, row.registration_type, row.stage) == criteria_of(startup))
+
+
+def compute_matches(schemes, criteria):
+    """Positions of the schemes matching `criteria` (domain, registration, stage)."""
+    domain, registration, stage = criteria
+    return match_indices(schemes, domain=domain, registration=registration, stage=stage)
+
+
+def hydrate(schemes, row):
+    """Scheme dicts for a fresh row (or profiles.MatchInfo)."""
+    return schemes_at(schemes, row.scheme_ids)
+
+
+def materialize(startup, schemes, version, scheme_ids=None):
+    """Store (and return) fresh matches for `startup`; the caller commits."""
+    criteria = criteria_of(startup)
+    if scheme_ids is None:
+        scheme_ids = compute_matches(schemes, criteria)
+    row = startup.scheme_match
+    if row is None:
+        row = startup.scheme_match = StartupSchemeMatch()
+    row.catalog_version = version
+    row.domain, row.registration_type, row.stage = criteria
+    row.scheme_ids = scheme_ids
+    row.computed_at = datetime.now(timezone.utc)
+    return row
+
+
+def matches_for(startup, row, schemes, version):
+    """Matching schemes for `startup`, recomputing and committing its row if `row` is stale."""
+    if not is_fresh(row, startup, version):
+        row = materialize(startup, schemes, version)
+        db.session.commit()
+    return hydrate(schemes, row)
+
+
+def recompute_all(schemes, version, force=False, batch_size=500):
+    """
+    Materialize matches for every startup whose row is missing or stale (every
+    startup with `force`). Startups sharing criteria are matched once.
+    Returns {"checked", "recomputed"}.
+    """
+    stats = {"checked": 0, "recomputed": 0}
+    cache = {}
+    last_id = 0
+    while True:
+        # Keyset pagination keeps each batch's query and session small
+        rows = (db.session.query(Startup, StartupSchemeMatch)
+                .outerjoin(StartupSchemeMatch, StartupSchemeMatch.startup_id == Startup.startup_id)
+                .filter(Startup.startup_id > last_id)
+                .order_by(Startup.startup_id)
+                .limit(batch_size)
+                .all())
+        if not rows:
+            break
+        for startup, row in rows:
+            stats["checked"] += 1
+            if not force and is_fresh(row, startup, version):
+                continue
+            criteria = criteria_of(startup)
+            if criteria not in cache:
+                cache[criteria] = compute_matches(schemes, criteria)
+            materialize(startup, schemes, version, cache[criteria])
+            stats["recomputed"] += 1
+        last_id = rows[-1][0].startup_id
+        db.session.commit()
+        db.session.expunge_all()
+
+    logger.info(f"Scheme matches at catalog {version}: checked {stats['checked']} startups, "
+                f"recomputed {stats['recomputed']} ({len(cache)} distinct criteria)")
+    return stats
@@ -1,6 +1,20 @@
-import json
+import os
 import re
+import sys
+import json
+import hashlib
 import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from atomic_files import atomic_write  # noqa: E402
+from scheme_catalog import catalog_path_for, write_catalog  # noqa: E402
+
+try:
+    import ahocorasick  # pyahocorasick, in requirements.txt
+except ImportError:
+    ahocorasick = None
 
 # ---------------- Logging Setup ---------------- #
 logging.basicConfig(
@@ -9,141 +23,380 @@ logging.basicConfig(
 )
 
 # ---------------- Utility Functions ---------------- #
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
 def clean_html(raw_html: str) -> str:
     """Removes HTML tags from a string safely."""
     if not raw_html:
         return ""
-    cleanr = re.compile(r'<[^>]+>')
-    return re.sub(cleanr, '', raw_html).strip()
+    return HTML_TAG_RE.sub('', raw_html).strip()
+
+
+# ---------------- Eligibility Keyword Maps ---------------- #
+DOMAIN_MAP = {
+    "agriculture": ["agri", "agtech", "farm", "animal husbandry", "aquaculture"],
+    "biotech": ["bio", "health", "medical", "pharma"],
+    "tech": ["tech", "it", "electronics", "digital", "software", "hardware"],
+    "manufacturing": ["manufacturing", "industrial", "production"],
+    "services": ["service", "trading", "tourism"],
+    "education": ["education", "skill"],
+    "social impact": ["social", "women", "sc/st", "tribal", "backward class"]
+}
+
+REG_MAP = {
+    "private limited": ["private limited", "company", "companies"],
+    "LLP": ["llp", "limited liability"],
+    "MSME": ["msme", "micro", "small", "medium enterprise"],
+    "society": ["society", "cooperative"],
+    "trust": ["trust"]
+}
+
+STAGE_MAP = {
+    "early": ["early", "new", "start-up", "startups", "innovators", "seed"],
+    "growth": ["growth", "expand", "expansion", "existing"],
+    "scaling": ["scaling", "scale"]
+}
+
+
+class KeywordMatcher:
+    """
+    Substring matcher for many keywords at once, built once at import.
+
+    The keywords are compiled into one pyahocorasick automaton and each text is
+    scanned in a single pass. If the package is missing (it is in
+    requirements.txt), the de-duplicated keyword table is checked with `in`
+    instead, with a warning.
+    Either way the result equals `keyword in text` for every keyword.
+    """
+
+    def __init__(self, keyword_labels):
+        # keyword_labels: {keyword: [label, ...]}
+        self.labels = {k.lower(): frozenset(v) for k, v in keyword_labels.items()}
+        self.automaton = None
+        if ahocorasick is None:
+            logging.warning("pyahocorasick is not installed; keyword matching falls back to one scan per keyword")
+        else:
+            self.automaton = ahocorasick.Automaton()
+            for keyword, labels in self.labels.items():
+                self.automaton.add_word(keyword, labels)
+            self.automaton.make_automaton()
+        self.table = list(self.labels.items())
+
+    def labels_in(self, text):
+        """Set of labels whose keywords occur anywhere in `text`."""
+        found = set()
+        if self.automaton is not None:
+            for _, labels in self.automaton.iter(text):
+                found |= labels
+        else:
+            for keyword, labels in self.table:
+                if keyword in text:
+                    found |= labels
+        return found
+
+
+def _keyword_labels(*maps):
+    keyword_labels = {}
+    for field, category_map in maps:
+        for category, keywords in category_map.items():
+            for keyword in keywords:
+                keyword_labels.setdefault(keyword.lower(), []).append((field, category))
+    return keyword_labels
+
+
+# Domain and stage keywords are searched in the full text, registration ones in the eligibility text
+FULL_TEXT_MATCHER = KeywordMatcher(_keyword_labels(("domain", DOMAIN_MAP), ("stage", STAGE_MAP)))
+ELIGIBILITY_MATCHER = KeywordMatcher(_keyword_labels(("registration", REG_MAP)))
 
 
 def map_eligibility(full_text: str, eligibility_text: str):
     """
     Map eligibility text into structured categories:
     domain, registration, and stage.
+    Categories are listed in the order of DOMAIN_MAP / REG_MAP / STAGE_MAP.
     """
-    eligibility_data = {"domain": [], "registration": [], "stage": []}
+    found = FULL_TEXT_MATCHER.labels_in(full_text) | ELIGIBILITY_MATCHER.labels_in(eligibility_text)
 
     # 1. Domain Mapping
-    domain_map = {
-        "agriculture": ["agri", "agtech", "farm", "animal husbandry", "aquaculture"],
-        "biotech": ["bio", "health", "medical", "pharma"],
-        "tech": ["tech", "it", "electronics", "digital", "software", "hardware"],
-        "manufacturing": ["manufacturing", "industrial", "production"],
-        "services": ["service", "trading", "tourism"],
-        "education": ["education", "skill"],
-        "social impact": ["social", "women", "sc/st", "tribal", "backward class"]
-    }
-    for domain, keywords in domain_map.items():
-        if any(keyword.lower() in full_text for keyword in keywords):
-            eligibility_data["domain"].append(domain)
-    if not eligibility_data["domain"]:
-        eligibility_data["domain"].append("all")
+    domains = [d for d in DOMAIN_MAP if ("domain", d) in found] or ["all"]
 
     # 2. Registration Mapping
-    reg_map = {
-        "private limited": ["private limited", "company", "companies"],
-        "LLP": ["llp", "limited liability"],
-        "MSME": ["msme", "micro", "small", "medium enterprise"],
-        "society": ["society", "cooperative"],
-        "trust": ["trust"]
-    }
-    for reg_type, keywords in reg_map.items():
-        if any(keyword.lower() in eligibility_text for keyword in keywords):
-            eligibility_data["registration"].append(reg_type)
-    if not eligibility_data["registration"]:
-        eligibility_data["registration"] = list(reg_map.keys())
+    registrations = [r for r in REG_MAP if ("registration", r) in found] or list(REG_MAP)
 
     # 3. Stage Mapping
-    stage_map = {
-        "early": ["early", "new", "start-up", "startups", "innovators", "seed"],
-        "growth": ["growth", "expand", "expansion", "existing"],
-        "scaling": ["scaling", "scale"]
+    stages = [s for s in STAGE_MAP if ("stage", s) in found] or list(STAGE_MAP)
+
+    return {
+        "domain": domains,
+        "registration": registrations,
+        "stage": stages
     }
-    for stage, keywords in stage_map.items():
-        if any(keyword.lower() in full_text for keyword in keywords):
-            eligibility_data["stage"].append(stage)
-    if not eligibility_data["stage"]:
-        eligibility_data["stage"] = list(stage_map.keys())
+
+
+# ---------------- Streaming JSON Reader ---------------- #
+class JSONStream:
+    """
+    Incremental reader for one large JSON document. Walks objects member by
+    member and arrays item by item, and only decodes the values that are asked
+    for, reading the file in `chunk_size` pieces, so memory stays at about one
+    scheme.
+    """
+
+    def __init__(self, f, chunk_size=64 * 1024):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size=None):
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next complete JSON value, reading more input until it parses."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Each retry re-parses from the start of the value, so at least double
+                # what is buffered: parsing a value of size n costs O(n), not O(n^2 / chunk)
+                if not self._fill(max(self.chunk_size, len(self.buf) - self.pos)):
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Iterate the keys of the object at the current position; the caller must consume each value."""
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self._expect(":")
+            yield key
+            if self._peek() == ",":
+                self.pos += 1
+                continue
+            self._expect("}")
+            return
+
+    def items(self):
+        """Decode the elements of the array at the current position one at a time."""
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self._peek() == ",":
+                self.pos += 1
+                continue
+            self._expect("]")
+            return
+
+    def descend(self, path):
+        """Position the stream at the value under the key `path` (e.g. ["data", "searchResult"])."""
+        for wanted in path:
+            for key in self.members():
+                if key == wanted:
+                    break
+                self.decode()   # skip sibling values
+            else:
+                raise KeyError(wanted)
+
+
+def iter_ministries(input_file, path=("data", "searchResult")):
+    """
+    Yield (ministry, schemes) pairs from `data.searchResult` one at a time;
+    `schemes` is an iterator that must be consumed before the next pair.
+    """
+    with open(input_file, "r", encoding="utf-8") as f:
+        stream = JSONStream(f)
+        stream.descend(path)
+        for ministry in stream.members():
+            if stream._peek() == "[":
+                schemes = stream.items()
+                yield ministry, schemes
+                for _ in schemes:   # whatever the caller left unread
+                    pass
+            else:
+                yield ministry, iter(stream.decode() or [])
+
+
+# ---------------- Per-scheme Processing ---------------- #
+# Bump when clean_html / map_eligibility / build_scheme change, so cached results are redone
+PIPELINE_VERSION = 2
+
+
+def scheme_fingerprint(ministry, scheme):
+    """Stable hash of one raw scheme (and the pipeline version that processed it)."""
+    payload = json.dumps([PIPELINE_VERSION, ministry, scheme], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def build_scheme(name, scheme):
+    """Clean one raw scheme and assign its eligibility criteria."""
+    # Benefits
+    benefits_list = scheme.get("benefits") or []
+    benefits = [clean_html(b).strip() for b in benefits_list if b]
+    if not benefits:
+        benefits = ["Details not provided."]
+
+    # Link
+    link = (scheme.get("linktoApplication") or [None])[0] or "#"
+
+    # Eligibility texts
+    eligibility_criteria_list = scheme.get("EligibilityCriteria") or []
+    raw_eligibility = [clean_html(e).strip() for e in eligibility_criteria_list if e]
+    eligibility_text = " ".join(raw_eligibility).lower()
+    sector_text = " ".join(scheme.get("sector") or []).lower()
+    brief_text = " ".join(scheme.get("brief") or []).lower()
+
+    full_text_for_search = f"{eligibility_text} {sector_text} {brief_text}"
+
+    # Map eligibility
+    eligibility_data = map_eligibility(full_text_for_search, eligibility_text)
 
     return {
-        "domain": list(set(eligibility_data["domain"])),
-        "registration": list(set(eligibility_data["registration"])),
-        "stage": list(set(eligibility_data["stage"]))
+        "name": name,
+        "benefits": benefits,
+        "link": link,
+        "eligibility": eligibility_data,
+        "raw_eligibility": raw_eligibility
     }
 
 
-# ---------------- Main Processing ---------------- #
-def process_raw_data(input_file="source_data.json", output_file="startup_schemes_final.json"):
-    """Reads nested source JSON, flattens it, and assigns eligibility criteria."""
+def _build_scheme_task(task):
+    name, scheme = task
+    return build_scheme(name, scheme)
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file next to `path` and rename it over, so readers never see a partial file."""
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
 
+
+def load_fingerprints(path):
     try:
-        with open(input_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logging.error(f"Error reading source file {input_file}: {e}")
-        return
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
 
-    schemes_data = data.get("data", {}).get("searchResult", {})
-    output_list = []
 
-    logging.info(f"Found {len(schemes_data)} ministries/organizations. Processing schemes...")
+# ---------------- Main Processing ---------------- #
+PENDING_BATCH = 512     # changed raw schemes held before they are sent to the pool
+def process_raw_data(input_file="source_data.json", output_file="startup_schemes_final.json",
+                     workers=None, fingerprint_file=None, full=False, batch_size=PENDING_BATCH):
+    """
+    Streams the nested source JSON, flattens it, and assigns eligibility criteria.
+    Schemes whose fingerprint matches the previous run are reused from
+    `fingerprint_file`; the rest are cleaned and mapped on a process pool in
+    batches of `batch_size` while the source is still being read, so at most
+    one batch of raw schemes is held at a time.
+    """
+    if fingerprint_file is None:
+        fingerprint_file = f"{os.path.splitext(output_file)[0]}.fingerprints.json"
+    previous = {} if full else load_fingerprints(fingerprint_file)
 
+    entries = []          # (scheme_key, fingerprint) in output order
+    results = {}          # scheme_key -> processed scheme
+    pending = []          # (scheme_key, (name, raw scheme)) waiting for the next batch
     processed_scheme_ids = set()  # to avoid duplicates
+    ministries = 0
+    changed = 0
+    pool = None
 
-    for ministry, schemes in schemes_data.items():
-        if not schemes:
-            continue
+    def flush():
+        nonlocal pool
+        tasks = [task for _, task in pending]
+        if workers == 1 or len(tasks) < 2:
+            built = map(_build_scheme_task, tasks)
+        else:
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            built = pool.map(_build_scheme_task, tasks, chunksize=max(1, len(tasks) // 32))
+        for (scheme_key, _), scheme in zip(pending, built):
+            results[scheme_key] = scheme
+        pending.clear()
 
-        for scheme in schemes:
-            # Extract scheme name
-            name_list = scheme.get("schname")
-            if not name_list or not name_list[0]:
-                continue
-            name = name_list[0].strip()
+    try:
+        for ministry, schemes in iter_ministries(input_file):
+            ministries += 1
+            for scheme in schemes:
+                # Extract scheme name
+                name_list = scheme.get("schname")
+                if not name_list or not name_list[0]:
+                    continue
+                name = name_list[0].strip()
 
-            # Unique ID by ministry + scheme name
-            scheme_id = (ministry, name)
-            if scheme_id in processed_scheme_ids:
-                continue
-            processed_scheme_ids.add(scheme_id)
-
-            # Benefits
-            benefits_list = scheme.get("benefits") or []
-            benefits = [clean_html(b).strip() for b in benefits_list if b]
-            if not benefits:
-                benefits = ["Details not provided."]
-
-            # Link
-            link = (scheme.get("linktoApplication") or [None])[0] or "#"
-
-            # Eligibility texts
-            eligibility_criteria_list = scheme.get("EligibilityCriteria") or []
-            eligibility_text = " ".join(
-                [clean_html(e).strip() for e in eligibility_criteria_list if e]
-            ).lower()
-            sector_text = " ".join(scheme.get("sector") or []).lower()
-            brief_text = " ".join(scheme.get("brief") or []).lower()
-
-            full_text_for_search = f"{eligibility_text} {sector_text} {brief_text}"
-
-            # Map eligibility
-            eligibility_data = map_eligibility(full_text_for_search, eligibility_text)
-
-            # Build final scheme object
-            new_scheme = {
-                "name": name,
-                "benefits": benefits,
-                "link": link,
-                "eligibility": eligibility_data,
-                "raw_eligibility": [clean_html(e).strip() for e in eligibility_criteria_list if e]
-            }
-            output_list.append(new_scheme)
-
-    # Save final JSON
+                # Unique ID by ministry + scheme name
+                scheme_key = f"{ministry}\x1f{name}"
+                if scheme_key in processed_scheme_ids:
+                    continue
+                processed_scheme_ids.add(scheme_key)
+
+                fingerprint = scheme_fingerprint(ministry, scheme)
+                entries.append((scheme_key, fingerprint))
+                cached = previous.get(scheme_key)
+                if cached and cached.get("fingerprint") == fingerprint:
+                    results[scheme_key] = cached["scheme"]
+                else:
+                    # Clean + map only the changed schemes
+                    pending.append((scheme_key, (name, scheme)))
+                    changed += 1
+                    if len(pending) >= batch_size:
+                        flush()
+        if pending:
+            flush()
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        logging.error(f"Error reading source file {input_file}: {e}")
+        return
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    logging.info(f"Found {ministries} ministries/organizations, {len(entries)} unique schemes "
+                 f"({changed} new or changed).")
+
+    output_list = [results[scheme_key] for scheme_key, _ in entries]
+
+    # Save final JSON (atomically), then the fingerprints for the next run
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(output_list, f, indent=2, ensure_ascii=False)
+        write_json_atomic(output_file, output_list)
+        # Binary catalog for the app's matcher (eligibility bitmasks + lazily decoded text)
+        write_catalog(catalog_path_for(output_file), output_list)
+        write_json_atomic(fingerprint_file, {
+            scheme_key: {"fingerprint": fingerprint, "scheme": results[scheme_key]}
+            for scheme_key, fingerprint in entries
+        })
         logging.info(f"Successfully processed and saved {len(output_list)} unique schemes to {output_file}.")
     except Exception as e:
         logging.error(f"Error writing output file {output_file}: {e}")
@@ -151,4 +404,10 @@ def process_raw_data(input_file="source_data.json", output_file="startup_schemes
 
 # ---------------- Entry Point ---------------- #
 if __name__ == "__main__":
-    process_raw_data("source_data.json", "startup_schemes_final.json")
+    parser = argparse.ArgumentParser(description="Flatten the scheme source dump into startup_schemes_final.json")
+    parser.add_argument("input_file", nargs="?", default="source_data.json")
+    parser.add_argument("output_file", nargs="?", default="startup_schemes_final.json")
+    parser.add_argument("--workers", type=int, default=None, help="processes for cleaning/mapping (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="ignore fingerprints and reprocess every scheme")
+    args = parser.parse_args()
+    process_raw_data(args.input_file, args.output_file, workers=args.workers, full=args.full)
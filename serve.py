@@ -0,0 +1,77 @@
+"""
+Launch the app with only a chosen subset of service roles.
+
+Examples:
+    python serve.py --roles auth,match --bind 0.0.0.0:5000
+    python serve.py --roles summarize --bind 0.0.0.0:5001
+    python serve.py --roles rag --bind 0.0.0.0:5002 --workers 1 --threads 8
+
+Put a reverse proxy in front to route /summarize, /api/rag/* etc. to the
+matching port. Worker/thread counts default to the per-role limits in
+blueprints.ROLES (override with ROLE_<NAME>_WORKERS / _THREADS or the flags here).
+Uses gunicorn when it is installed, otherwise the threaded Flask server (one process).
+"""
+import os
+import argparse
+import logging
+
+from blueprints import parse_roles, role_limits
+
+logger = logging.getLogger(__name__)
+
+
+def process_limits(roles):
+    """Workers = the largest worker count among the roles; threads = sum of the role thread limits."""
+    limits = [role_limits(name) for name in roles]
+    return max(w for w, _ in limits), sum(t for _, t in limits)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run Startup Assistant service roles")
+    parser.add_argument("--roles", default=os.environ.get("APP_ROLES", "all"),
+                        help="Comma-separated roles: auth, match, summarize, rag (default: all)")
+    parser.add_argument("--bind", default="0.0.0.0:5000")
+    parser.add_argument("--workers", type=int, help="Override the worker process count")
+    parser.add_argument("--threads", type=int, help="Override the threads per worker")
+    parser.add_argument("--warmup", action="store_true",
+                        help="Load the subsystems the roles need before accepting requests")
+    args = parser.parse_args(argv)
+
+    roles = parse_roles(args.roles)
+    workers, threads = process_limits(roles)
+    workers = args.workers or workers
+    threads = args.threads or threads
+
+    # app.py reads these when it builds the module-level app in each worker
+    os.environ["APP_ROLES"] = ",".join(roles)
+    if args.warmup:
+        os.environ.setdefault("APP_WARMUP", "roles")
+
+    logger.info(f"Starting roles {roles} on {args.bind} with {workers} worker(s) x {threads} thread(s)")
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logger.warning("gunicorn is not installed; falling back to a single threaded Flask process")
+        from app import app
+        host, _, port = args.bind.rpartition(":")
+        app.run(host=host or "0.0.0.0", port=int(port), threaded=True)
+        return
+
+    class RoleApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", args.bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread")
+
+        def load(self):
+            from app import app
+            return app
+
+    RoleApplication().run()
+
+
+if __name__ == "__main__":
+    main()
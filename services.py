@@ -0,0 +1,351 @@
+"""
+Lazily initialized heavy subsystems shared by the Flask app.
+
+Nothing here is loaded at import time: the embedding model, the legal_docs
+connection, the OCR stack and the LLM client are created on first use, so
+workers that only serve signup/login/match never pay for them.
+Set APP_WARMUP (e.g. "embedding,rag_db" or "all") to load chosen subsystems at startup instead.
+"""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+SCHEMES_FILE = os.path.join(BASE_DIR, "startup_schemes_final.json")
+# How often (seconds) get_schemes() checks SCHEMES_FILE / its .catalog for a newer version
+SCHEMES_CHECK_INTERVAL = float(os.environ.get("SCHEMES_CHECK_INTERVAL", "2"))
+RAG_SNAPSHOT_PATH = os.environ.get("RAG_SNAPSHOT_PATH", os.path.join(BASE_DIR, "legal_docs.snap"))
+RAG_QUANTIZATION = os.environ.get("RAG_QUANTIZATION", "").lower()
+FUNDING_CSV = os.environ.get("FUNDING_CSV", os.path.join(BASE_DIR, "dataset", "startup_funding.csv"))
+
+# Query micro-batching window; EMBEDDING_BATCH_WINDOW_MS=0 encodes each query on its own
+EMBEDDING_BATCH_WINDOW_MS = float(os.environ.get("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH = int(os.environ.get("EMBEDDING_MAX_BATCH", "32"))
+
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+POPPLER_PATH = os.environ.get("POPPLER_PATH", r"C:\poppler-windows-25.07.0-0\poppler-25.07.0\Library\bin")
+
+
+# ---------------- Startup timing ---------------- #
+class StartupTimer:
+    """Collects how long each startup step took so it can be logged as one breakdown."""
+
+    def __init__(self):
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.steps.append((name, seconds))
+
+    def time(self, name):
+        return _TimedStep(self, name)
+
+    def log_breakdown(self, title="Startup"):
+        total = sum(seconds for _, seconds in self.steps)
+        parts = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.steps)
+        logger.info(f"{title} took {total * 1000:.0f}ms ({parts or 'nothing loaded'})")
+
+
+class _TimedStep:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+startup_timer = StartupTimer()
+
+
+# ---------------- Lazy loading ---------------- #
+_lock = threading.RLock()
+_instances = {}
+
+
+def _lazy(name, factory):
+    """Create the named subsystem once (thread-safe) and return the cached instance."""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            with startup_timer.time(name):
+                _instances[name] = factory()
+            logger.info(f"Initialized {name} in {startup_timer.steps[-1][1] * 1000:.0f}ms")
+        return _instances[name]
+
+
+def is_loaded(name):
+    return name in _instances
+
+
+def get_embedding_model():
+    """SentenceTransformer used for RAG query embeddings."""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _lazy("embedding", load)
+
+
+def get_query_encoder():
+    """
+    Object with .encode(text) for RAG queries. Concurrent queries are micro-batched
+    into one forward pass unless EMBEDDING_BATCH_WINDOW_MS is 0.
+    """
+    def load():
+        model = get_embedding_model()
+        if EMBEDDING_BATCH_WINDOW_MS <= 0:
+            return model
+        from embedding_batcher import EmbeddingBatcher
+        return EmbeddingBatcher(model, max_batch_size=EMBEDDING_MAX_BATCH, max_wait_ms=EMBEDDING_BATCH_WINDOW_MS)
+    return _lazy("query_encoder", load)
+
+
+def get_rag_cursor():
+    """Cursor on a direct psycopg2 connection for the legal_docs table."""
+    def connect():
+        import psycopg2
+        from instrumentation import timed_cursor_class
+        conn = psycopg2.connect(
+            host="localhost",
+            database="startup_assistant",
+            user="postgres",
+            password="300234",
+            port="5432",
+            cursor_factory=timed_cursor_class(),
+        )
+        return conn.cursor()
+    return _lazy("rag_db", connect)
+
+
+def get_rag_snapshot():
+    """Memory-mapped legal_docs snapshot, or None if none has been exported."""
+    def load():
+        from embedding_snapshot import open_snapshot
+        return open_snapshot(RAG_SNAPSHOT_PATH)
+    return _lazy("rag_snapshot", load)
+
+
+def get_rag_index():
+    """
+    Quantized first-pass index over the snapshot, if RAG_QUANTIZATION is set. It is saved
+    next to the snapshot (<snapshot>.int8 / .float16) on first use and memory-mapped,
+    so workers share one copy; it is rebuilt when the snapshot changes.
+    """
+    def build():
+        from quantized_store import QuantizedEmbeddingStore, open_index, save_index
+        snapshot = get_rag_snapshot()
+        if snapshot is None or RAG_QUANTIZATION not in QuantizedEmbeddingStore.MODES:
+            return None
+        path = f"{snapshot.path}.{RAG_QUANTIZATION}"
+        index = open_index(path, RAG_QUANTIZATION, exact=snapshot.matrix, source_crc=snapshot.crc32)
+        if index is None:
+            built = QuantizedEmbeddingStore(snapshot.matrix, mode=RAG_QUANTIZATION, exact=snapshot.matrix)
+            try:
+                save_index(path, built, snapshot.crc32)
+            except OSError as e:
+                logger.warning(f"Could not save {path} ({e}); keeping a private {RAG_QUANTIZATION} index")
+                return built
+            index = open_index(path, RAG_QUANTIZATION, exact=snapshot.matrix, source_crc=snapshot.crc32)
+            logger.info(f"Built {RAG_QUANTIZATION} RAG index {path}")
+        logger.info(f"Loaded {RAG_QUANTIZATION} RAG index ({index.nbytes / 1e6:.1f} MB, memory-mapped)")
+        return index
+    return _lazy("rag_index", build)
+
+
+def get_rag_store():
+    """
+    VectorStore used for RAG retrieval: the snapshot (through the quantized index
+    when RAG_QUANTIZATION is set) if one was exported, otherwise legal_docs in Postgres.
+    """
+    def build():
+        from vector_store import SnapshotVectorStore, PostgresVectorStore
+        snapshot = get_rag_snapshot()
+        if snapshot is not None:
+            return SnapshotVectorStore(snapshot, get_rag_index())
+        return PostgresVectorStore(get_rag_cursor().connection, key_column="id")
+    return _lazy("rag_store", build)
+
+
+class OCRStack:
+    """pytesseract + PIL + pdf2image, imported together on first OCR request."""
+
+    def __init__(self):
+        import pytesseract
+        from PIL import Image
+        from pdf2image import convert_from_path, convert_from_bytes, pdfinfo_from_path
+
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        self.pytesseract = pytesseract
+        self.Image = Image
+        self.convert_from_path = convert_from_path
+        self.convert_from_bytes = convert_from_bytes
+        self.pdfinfo_from_path = pdfinfo_from_path
+        self.poppler_path = POPPLER_PATH
+
+
+def get_ocr():
+    return _lazy("ocr", OCRStack)
+
+
+def get_llm():
+    """Ollama client module; each chat() call is timed as an llm_chat span."""
+    def load():
+        import ollama
+        from instrumentation import TimedLLM
+        return TimedLLM(ollama)
+    return _lazy("llm", load)
+
+
+_schemes_checked_at = 0.0
+_schemes_file_state = None
+
+
+def _scheme_files_state():
+    from scheme_catalog import catalog_path_for
+    state = []
+    for path in (SCHEMES_FILE, catalog_path_for(SCHEMES_FILE)):
+        try:
+            st = os.stat(path)
+            state.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+
+def _reload_schemes_if_changed():
+    """
+    Drop the loaded catalog (and its version) when the scheme files changed on disk,
+    so every worker moves to a new scraper run within SCHEMES_CHECK_INTERVAL instead
+    of re-materializing startup matches against the catalog it started with.
+    """
+    global _schemes_checked_at, _schemes_file_state
+    now = time.monotonic()
+    if now - _schemes_checked_at < SCHEMES_CHECK_INTERVAL:
+        return
+    _schemes_checked_at = now
+    state = _scheme_files_state()
+    if _schemes_file_state is not None and state != _schemes_file_state:
+        with _lock:
+            if _instances.pop("schemes", None) is not None:
+                logger.info(f"{SCHEMES_FILE} changed on disk; reloading schemes")
+            _instances.pop("schemes_version", None)
+    _schemes_file_state = state
+
+
+def get_schemes():
+    """
+    Scheme catalog used by the matcher (empty list if it cannot be loaded).
+    The binary .catalog next to SCHEMES_FILE is used when it is at least as new as the JSON;
+    both are reloaded when they change on disk.
+    """
+    def load():
+        from matcher import load_schemes
+        from scheme_catalog import catalog_path_for, open_catalog
+        catalog_path = catalog_path_for(SCHEMES_FILE)
+        if os.path.exists(catalog_path) and (
+                not os.path.exists(SCHEMES_FILE)
+                or os.path.getmtime(catalog_path) >= os.path.getmtime(SCHEMES_FILE)):
+            catalog = open_catalog(catalog_path)
+            if catalog is not None:
+                return catalog
+        try:
+            schemes = load_schemes(SCHEMES_FILE)
+            logger.info(f"Loaded {len(schemes)} schemes from {SCHEMES_FILE}")
+            return schemes
+        except Exception as e:
+            logger.exception(f"Failed to load schemes from {SCHEMES_FILE}: {e}")
+            return []
+    _reload_schemes_if_changed()
+    return _lazy("schemes", load)
+
+
+def get_schemes_and_version():
+    """
+    (get_schemes(), its content version) as one consistent pair; use this when storing
+    per-startup matches so a reload between two calls cannot mix catalogs.
+    """
+    from scheme_matches import catalog_version
+    schemes = get_schemes()
+    pair = _lazy("schemes_version", lambda: (schemes, catalog_version(schemes)))
+    if pair[0] is not schemes:
+        with _lock:
+            pair = _instances["schemes_version"] = (schemes, catalog_version(schemes))
+    return pair
+
+
+def get_schemes_version():
+    """Content version of get_schemes(), stored with materialized per-startup matches."""
+    return get_schemes_and_version()[1]
+
+
+def get_funding_store():
+    """
+    Columnar funding-rounds store for the analytics dashboard. Rows appended to
+    FUNDING_CSV since the last call are ingested incrementally.
+    """
+    def load():
+        from funding_analytics import FundingStore
+        return FundingStore()
+    store = _lazy("funding", load)
+    store.refresh(FUNDING_CSV)
+    return store
+
+
+def get_funding_index():
+    """Comparable-startup / investor indexes over the funding store, updated as it grows."""
+    def build():
+        from funding_index import FundingIndex
+        return FundingIndex(get_funding_store())
+    index = _lazy("funding_index", build)
+    get_funding_store()
+    index.update()
+    return index
+
+
+# ---------------- Warm-up ---------------- #
+WARMUP_STEPS = {
+    "schemes": get_schemes_version,
+    "embedding": lambda: get_query_encoder().encode("warm-up"),
+    "rag_db": get_rag_cursor,
+    "rag_snapshot": get_rag_store,
+    "ocr": get_ocr,
+    "llm": get_llm,
+    "funding": get_funding_index,
+}
+
+
+def warm_up(names=None):
+    """
+    Eagerly initialize subsystems. `names` is a list or comma-separated string of
+    WARMUP_STEPS keys, or "all"; defaults to the APP_WARMUP environment variable.
+    """
+    if names is None:
+        names = os.environ.get("APP_WARMUP", "")
+    if isinstance(names, str):
+        names = [n.strip() for n in names.split(",") if n.strip()]
+    if "all" in names:
+        names = list(WARMUP_STEPS)
+
+    for name in names:
+        step = WARMUP_STEPS.get(name)
+        if step is None:
+            logger.warning(f"Unknown warm-up step {name!r}, expected one of {sorted(WARMUP_STEPS)}")
+            continue
+        try:
+            step()
+        except Exception:
+            logger.exception(f"Warm-up of {name} failed; it will be retried on first use")
@@ -0,0 +1,165 @@
+"""
+Streaming section parser for bare-act PDFs (Companies Act, LLP Act, GST, ...).
+
+Pages are consumed one at a time and only the text of the section currently
+being read is buffered, so a 400-page act is never held as one string.
+Sections come out of iter_sections() as they complete:
+
+    {"section": "Section 12", "title": "Registered office of company.", "text": "..."}
+
+The section grammar is the one LLM-Mistral/Pdfextracter.py has always used
+(SECTION_PATTERN); a match is only emitted once the next section boundary is
+fully inside the buffer, so results are identical to running the pattern over
+the whole act at once.
+
+Usage:
+    python statute_parser.py --list
+    python statute_parser.py Docs/CompaniesAct.pdf [--out companies_act_sections.json]
+    python statute_parser.py --all --out-dir parsed/
+"""
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import textwrap
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PDF_DIRS = [os.path.join(BASE_DIR, "Docs"), os.path.join(BASE_DIR, "rag", "acts_pdfs")]
+
+# Section number (+ optional letter), then everything up to the next "\n<number>. " line
+SECTION_PATTERN = re.compile(r"\n?\s*(\d+[A-Z]?)\.?\s+(.*?)(?=\n\s*\d+[A-Z]?\.\s|\Z)", re.DOTALL)
+BOUNDARY_PATTERN = re.compile(r"\n\s*\d+[A-Z]?\.\s")
+
+
+def section_record(sec_num, content):
+    lines = content.strip().split("\n", 1)
+    title = lines[0].strip()
+    body = lines[1].strip() if len(lines) > 1 else ""
+    return {
+        "section": f"Section {sec_num}",
+        "title": title,
+        "text": body
+    }
+
+
+def iter_sections(pages):
+    """
+    Yield section records from an iterable of page texts.
+
+    The buffer keeps only unconsumed text. A match is final once the boundary
+    that ends it lies wholly inside the buffer with at least one character
+    after it; otherwise more pages are read (at the end of input, \\Z ends it).
+    """
+    buffer = ""
+    pos = 0
+    pages = iter(pages)
+    exhausted = False
+
+    while True:
+        match = SECTION_PATTERN.search(buffer, pos)
+        if match is not None and not exhausted:
+            boundary = BOUNDARY_PATTERN.match(buffer, match.end())
+            if boundary is None or boundary.end() >= len(buffer):
+                match = None    # ended by \Z or a boundary that may still grow: need more text
+
+        if match is not None:
+            yield section_record(match.group(1), match.group(2))
+            pos = match.end()
+            continue
+
+        if exhausted:
+            return
+        page = next(pages, None)
+        if page is None:
+            exhausted = True
+        else:
+            # Drop consumed text so the buffer stays about one section long
+            buffer = buffer[pos:] + page
+            pos = 0
+
+
+def iter_pdf_pages(path):
+    """Page texts of a PDF, extracted lazily with PyMuPDF."""
+    import fitz
+
+    with fitz.open(path) as doc:
+        for page in doc:
+            yield page.get_text()
+
+
+def parse_pdf(path):
+    """Generator of section records for the PDF at `path`."""
+    return iter_sections(iter_pdf_pages(path))
+
+
+def write_sections(sections, out_path):
+    """
+    Stream section records into a JSON array file; returns the number written.
+    The file is byte-for-byte what json.dump(list(sections), f, indent=2) writes.
+    """
+    count = 0
+    with open(out_path, "w") as f:
+        f.write("[")
+        for record in sections:
+            f.write(",\n" if count else "\n")
+            f.write(textwrap.indent(json.dumps(record, indent=2), "  "))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+def available_pdfs():
+    pdfs = []
+    for directory in PDF_DIRS:
+        if os.path.isdir(directory):
+            pdfs += sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                           if name.lower().endswith(".pdf"))
+    return pdfs
+
+
+def default_output(pdf_path, out_dir=None):
+    stem = re.sub(r"[^0-9a-z]+", "_", os.path.splitext(os.path.basename(pdf_path))[0].lower()).strip("_")
+    return os.path.join(out_dir or ".", f"{stem}_sections.json")
+
+
+# ---------------- CLI ---------------- #
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Split statute PDFs into section records (JSON)")
+    parser.add_argument("pdfs", nargs="*", help="PDF files (see --list for the ones in Docs/ and rag/acts_pdfs)")
+    parser.add_argument("--all", action="store_true", help="parse every PDF in Docs/ and rag/acts_pdfs")
+    parser.add_argument("--list", action="store_true", help="list the PDFs found in Docs/ and rag/acts_pdfs")
+    parser.add_argument("--out", help="output JSON path (single PDF only)")
+    parser.add_argument("--out-dir", help="directory for <pdf name>_sections.json outputs")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for path in available_pdfs():
+            print(os.path.relpath(path, BASE_DIR))
+        return 0
+
+    pdfs = available_pdfs() if args.all else args.pdfs
+    if not pdfs:
+        parser.error("give one or more PDFs, or --all")
+    if args.out and len(pdfs) > 1:
+        parser.error("--out only works with a single PDF; use --out-dir")
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    status = 0
+    for pdf in pdfs:
+        out_path = args.out or default_output(pdf, args.out_dir)
+        try:
+            count = write_sections(parse_pdf(pdf), out_path)
+        except Exception as e:
+            logging.error(f"{pdf}: {e}")
+            status = 1
+            continue
+        logging.info(f"{pdf}: {count} sections -> {out_path}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Upload handling shared by the Flask app and the ASGI app.
+
+File parts are parsed straight into a SpooledTemporaryFile: in memory up to
+UPLOAD_SPOOL_BYTES, then rolled over to an anonymous temporary file that the
+OS reclaims as soon as it is closed (Werkzeug closes it when the request
+ends, whatever happened in the view). Request bodies above MAX_UPLOAD_BYTES
+are refused with 413 while streaming, before they reach memory or /tmp.
+upload_source() hands the upload to path- or bytes-based tools without
+reading a spilled file back into memory.
+"""
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+from flask import Request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+
+UPLOAD_SPOOL_BYTES = int(os.environ.get("UPLOAD_SPOOL_BYTES", str(4 * 1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+
+
+class SpooledUploadRequest(Request):
+    """Request whose uploaded files are spooled with our threshold instead of Werkzeug's 500 KB."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="rb+")
+
+
+def too_large(e):
+    return jsonify({"error": f"File too large (limit {round(MAX_UPLOAD_BYTES / 2**20, 1):g} MB)"}), 413
+
+
+def init_uploads(app):
+    app.request_class = SpooledUploadRequest
+    if app.config.get("MAX_CONTENT_LENGTH") is None:
+        app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+    app.register_error_handler(RequestEntityTooLarge, too_large)
+
+
+def _fd_path(f):
+    """Path another process can open to read the (possibly unlinked) file `f`, or None."""
+    try:
+        fd = f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    # /proc/<pid>, not /proc/self: the reader is a child process (e.g. pdftoppm)
+    path = f"/proc/{os.getpid()}/fd/{fd}"
+    return path if os.path.exists(path) else None
+
+
+@contextmanager
+def upload_source(stream):
+    """
+    The whole upload, for tools that take a path or bytes (e.g. pdf2image):
+    a view of the spool buffer (no copy) while the upload is still in memory,
+    the spool file's /proc fd path once it has rolled over to disk, and only
+    where neither exists the bytes read back. A view is released on exit so
+    the spool can be closed.
+    """
+    stream.seek(0)
+    inner = getattr(stream, "_file", stream)
+    if isinstance(inner, io.BytesIO):
+        view = inner.getbuffer()
+        try:
+            yield view
+        finally:
+            view.release()
+        return
+    path = _fd_path(inner)
+    if path is not None:
+        inner.flush()
+        yield path
+    else:
+        yield stream.read()
@@ -0,0 +1,319 @@
+"""
+One interface over the places legal-section embeddings live.
+
+    NumpyVectorStore    : in-memory matrix (tests, small corpora, one-off scripts)
+    SnapshotVectorStore : read-only view of a memory-mapped EmbeddingSnapshot,
+                          optionally searched through a QuantizedEmbeddingStore
+    PostgresVectorStore : the legal_docs table
+    ChromaVectorStore   : a chromadb collection (LLM-Mistral/chroma_db)
+
+Every store takes precomputed embeddings, upserts in batches and reports a
+content hash per id, so sync_documents() can re-embed and write only the
+sections that were added or changed since the last run.
+"""
+import hashlib
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Same shape as the (score, key, section, content) tuples the snapshot returns
+SearchHit = namedtuple("SearchHit", "score doc_id section content")
+
+
+def content_hash(text):
+    return hashlib.md5((text or "").encode("utf-8")).hexdigest()
+
+
+def top_k_rows(matrix, query_embedding, top_k, norms=None):
+    """(indices, scores) of the top_k rows of `matrix` by cosine similarity, best first."""
+    if not len(matrix):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    q = np.asarray(query_embedding, dtype=np.float32).ravel()
+    if norms is None:
+        norms = np.linalg.norm(matrix, axis=1)
+    scores = (matrix @ q) / (norms * np.linalg.norm(q) + 1e-8)
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
+
+
+class VectorStore:
+    """Interface shared by every store; ids are strings or ints unique within the store."""
+
+    def search(self, query_embedding, top_k=5):
+        """[SearchHit] for the top_k most similar rows, best first."""
+        raise NotImplementedError
+
+    def upsert(self, ids, embeddings, documents, sections=None):
+        """Insert or replace rows, in as few round trips as the backend allows."""
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def fingerprints(self):
+        """{id: content_hash(document)} for every stored row."""
+        raise NotImplementedError
+
+    def count(self):
+        return len(self.fingerprints())
+
+
+class ReadOnlyStoreError(Exception):
+    pass
+
+
+# ---------------- NumPy ---------------- #
+class NumpyVectorStore(VectorStore):
+    """In-memory store; rows are replaced in place and deletions compact the arrays."""
+
+    def __init__(self, dim=None):
+        self.dim = dim
+        self.ids = []
+        self.sections = []
+        self.documents = []
+        self.matrix = np.zeros((0, dim or 0), dtype=np.float32)
+        self._rows = {}
+
+    def search(self, query_embedding, top_k=5):
+        indices, scores = top_k_rows(self.matrix, query_embedding, top_k)
+        return [SearchHit(float(s), self.ids[i], self.sections[i], self.documents[i]) for i, s in zip(indices, scores)]
+
+    def upsert(self, ids, embeddings, documents, sections=None):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+        sections = sections or [""] * len(ids)
+        new_rows = []
+        for doc_id, embedding, document, section in zip(ids, embeddings, documents, sections):
+            row = self._rows.get(doc_id)
+            if row is None:
+                self._rows[doc_id] = len(self.ids)
+                new_rows.append(embedding)
+                self.ids.append(doc_id)
+                self.documents.append(document)
+                self.sections.append(section)
+            else:
+                if row < len(self.matrix):
+                    self.matrix[row] = embedding
+                else:   # repeated id within this call
+                    new_rows[row - len(self.matrix)] = embedding
+                self.documents[row] = document
+                self.sections[row] = section
+        if new_rows:
+            self.matrix = np.vstack([self.matrix, np.asarray(new_rows, dtype=np.float32)])
+
+    def delete(self, ids):
+        drop = {self._rows[i] for i in ids if i in self._rows}
+        if not drop:
+            return
+        keep = [r for r in range(len(self.ids)) if r not in drop]
+        self.matrix = self.matrix[keep]
+        self.ids = [self.ids[r] for r in keep]
+        self.documents = [self.documents[r] for r in keep]
+        self.sections = [self.sections[r] for r in keep]
+        self._rows = {doc_id: r for r, doc_id in enumerate(self.ids)}
+
+    def fingerprints(self):
+        return {doc_id: content_hash(doc) for doc_id, doc in zip(self.ids, self.documents)}
+
+    def count(self):
+        return len(self.ids)
+
+
+# ---------------- Snapshot ---------------- #
+class SnapshotVectorStore(VectorStore):
+    """
+    Read-only store over an EmbeddingSnapshot (and optional quantized first-pass index).
+    `key_column` picks the id hits are reported under, as for PostgresVectorStore.
+    """
+
+    def __init__(self, snapshot, index=None, key_column="id"):
+        self.snapshot = snapshot
+        self.index = index
+        self.key_column = key_column
+
+    def search(self, query_embedding, top_k=5):
+        with span("rag_score", store="snapshot"):
+            if self.index is not None:
+                indices, scores = self.index.search(query_embedding, top_k)
+            else:
+                indices, scores = top_k_rows(self.snapshot.matrix, query_embedding, top_k, self.snapshot.norms)
+        with span("rag_fetch", store="snapshot"):
+            hits = self.snapshot.rows(indices, scores, self.key_column)
+        return [SearchHit(*hit) for hit in hits]
+
+    def upsert(self, ids, embeddings, documents, sections=None):
+        raise ReadOnlyStoreError("Snapshots are rebuilt with `python embedding_snapshot.py export`")
+
+    delete = upsert
+
+    def fingerprints(self):
+        return {self.snapshot.key(i, self.key_column): content_hash(self.snapshot.content(i))
+                for i in range(self.snapshot.count)}
+
+    def count(self):
+        return self.snapshot.count
+
+
+# ---------------- Postgres ---------------- #
+class PostgresVectorStore(VectorStore):
+    """
+    legal_docs (or a table with the same columns) on a psycopg2 connection.
+    `key_column` identifies a row: "id" for the serial key, "doc_id" for section ids.
+    """
+
+    def __init__(self, conn, table="legal_docs", key_column="id", batch_size=500):
+        self.conn = conn
+        self.table = table
+        self.key_column = key_column
+        self.batch_size = batch_size
+
+    def search(self, query_embedding, top_k=5):
+        # Fetch (query + transfer + array conversion) and scoring are separate spans
+        with span("rag_fetch", store="postgres"):
+            with self.conn.cursor() as cur:
+                cur.execute(f"SELECT {self.key_column}, section, content, embedding FROM {self.table} "
+                            "WHERE embedding IS NOT NULL")
+                rows = cur.fetchall()
+            if not rows:
+                return []
+            matrix = np.asarray([r[3] for r in rows], dtype=np.float32)
+        with span("rag_score", store="postgres"):
+            indices, scores = top_k_rows(matrix, query_embedding, top_k)
+        return [SearchHit(float(s), rows[i][0], rows[i][1], rows[i][2]) for i, s in zip(indices, scores)]
+
+    def upsert(self, ids, embeddings, documents, sections=None):
+        from psycopg2.extras import execute_values
+
+        sections = sections or [""] * len(ids)
+        rows = [(doc_id, section, document, np.asarray(embedding, dtype=np.float32).tolist())
+                for doc_id, embedding, document, section in zip(ids, embeddings, documents, sections)]
+        # No unique constraint is assumed on the key, so replace = delete + insert, in one transaction
+        with self.conn, self.conn.cursor() as cur:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                cur.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = ANY(%s)",
+                            ([r[0] for r in batch],))
+                execute_values(
+                    cur,
+                    f"INSERT INTO {self.table} ({self.key_column}, section, content, embedding) VALUES %s",
+                    batch,
+                    page_size=self.batch_size,
+                )
+
+    def delete(self, ids):
+        with self.conn, self.conn.cursor() as cur:
+            cur.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = ANY(%s)", (list(ids),))
+
+    def fingerprints(self):
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT {self.key_column}, md5(coalesce(content, '')) FROM {self.table}")
+            return dict(cur.fetchall())
+
+
+# ---------------- Chroma ---------------- #
+class ChromaVectorStore(VectorStore):
+    """A chromadb collection; documents carry their content hash in the metadata."""
+
+    # Chroma rejects batches above its max_batch_size (5461 by default)
+    def __init__(self, collection, batch_size=1000):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.space = (collection.metadata or {}).get("hnsw:space", "l2")
+
+    def _score(self, distance):
+        if self.space == "cosine":
+            return 1.0 - distance
+        if self.space == "ip":
+            return -distance
+        # Squared L2 between unit vectors (MiniLM output is normalized): cos = 1 - d/2
+        return 1.0 - distance / 2.0
+
+    def search(self, query_embedding, top_k=5):
+        result = self.collection.query(
+            query_embeddings=[np.asarray(query_embedding, dtype=np.float32).tolist()],
+            n_results=top_k,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            SearchHit(self._score(distance), doc_id, (meta or {}).get("section", ""), document)
+            for doc_id, document, meta, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0])
+        ]
+
+    def upsert(self, ids, embeddings, documents, sections=None, metadatas=None):
+        sections = sections or [""] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        metadatas = [{**meta, "section": section, "content_hash": content_hash(document)}
+                     for meta, section, document in zip(metadatas, sections, documents)]
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        for start in range(0, len(ids), self.batch_size):
+            end = start + self.batch_size
+            self.collection.upsert(
+                ids=list(ids[start:end]),
+                embeddings=embeddings[start:end].tolist(),
+                documents=list(documents[start:end]),
+                metadatas=metadatas[start:end],
+            )
+
+    def delete(self, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), self.batch_size):
+            self.collection.delete(ids=ids[start:start + self.batch_size])
+
+    def fingerprints(self):
+        existing = self.collection.get(include=["metadatas"])
+        return {doc_id: (meta or {}).get("content_hash")
+                for doc_id, meta in zip(existing["ids"], existing["metadatas"])}
+
+    def count(self):
+        return self.collection.count()
+
+
+# ---------------- Sync ---------------- #
+def sync_documents(store, ids, documents, encode, sections=None, extra=None, prune=True, batch_size=64):
+    """
+    Make `store` hold exactly these documents, embedding only what changed.
+
+    `encode(list_of_texts, batch_size=...)` is called once for all new / changed
+    documents (e.g. SentenceTransformer.encode); unchanged ids are skipped and,
+    with `prune`, ids no longer present are deleted. `extra` is a list of
+    per-document keyword dicts some stores accept (e.g. Chroma metadatas).
+    Returns counts of added / updated / unchanged / deleted rows.
+    """
+    sections = sections or [""] * len(ids)
+    existing = store.fingerprints()
+    changed = [i for i, (doc_id, doc) in enumerate(zip(ids, documents))
+               if existing.get(doc_id) != content_hash(doc)]
+
+    stats = {
+        "added": sum(1 for i in changed if ids[i] not in existing),
+        "updated": sum(1 for i in changed if ids[i] in existing),
+        "unchanged": len(ids) - len(changed),
+        "deleted": 0,
+    }
+
+    if changed:
+        texts = [documents[i] for i in changed]
+        embeddings = np.asarray(encode(texts, batch_size=batch_size), dtype=np.float32)
+        kwargs = {}
+        if extra is not None:
+            kwargs["metadatas"] = [extra[i] for i in changed]
+        store.upsert([ids[i] for i in changed], embeddings, texts, [sections[i] for i in changed], **kwargs)
+
+    if prune:
+        stale = set(existing) - set(ids)
+        if stale:
+            store.delete(sorted(stale, key=str))
+            stats["deleted"] = len(stale)
+
+    logger.info(f"Synced {len(ids)} documents: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    return stats